@@ -0,0 +1,53 @@
+"""Microbenchmark for decoding and encoding config documents.
+
+Compares the precomputed codecs in `trainerdex.discord_bot.datatypes` with the reflection based approach they
+replaced, which called `inspect.signature` for every key and `dataclasses.asdict` to encode.
+
+Run from the repository root with `python -m benchmarks.datatypes`.
+"""
+import inspect
+import timeit
+from dataclasses import asdict
+
+from trainerdex.discord_bot.datatypes import GuildConfig, StoredRoles
+
+GUILD_DOCUMENT = {
+    "_id": 364313717720219651,
+    "assign_roles_on_join": True,
+    "set_nickname_on_join": True,
+    "set_nickname_on_update": False,
+    "roles_to_assign_on_approval": {
+        "add": [364313717720219652, 364313717720219653, 364313717720219654],
+        "remove": [364313717720219655],
+    },
+    "mystic_role": 430113444558274560,
+    "valor_role": 430113457149575168,
+    "instinct_role": 430113431333371924,
+    "tl40_role": None,
+    "introduction_note": None,
+    "enabled": True,
+    "timezone": "Europe/London",
+    "post_weekly_leaderboards": True,
+    "leaderboard_channel_id": 393177706029776898,
+    "mod_role_ids": [614101299197378571, 614101299197378572],
+}
+
+
+def reflective_decode(mapping):
+    mapping = dict(mapping)
+    mapping["roles_to_assign_on_approval"] = StoredRoles(**mapping.pop("roles_to_assign_on_approval", {}))
+    return GuildConfig(**{k: v for k, v in mapping.items() if k in inspect.signature(GuildConfig).parameters})
+
+
+def report(name: str, baseline, candidate, number: int) -> None:
+    before = timeit.timeit(baseline, number=number) / number * 1e6
+    after = timeit.timeit(candidate, number=number) / number * 1e6
+    print(f"{name}: {before:.2f}µs -> {after:.2f}µs ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    document = GuildConfig.from_mapping(GUILD_DOCUMENT)
+    report(
+        "decode", lambda: reflective_decode(GUILD_DOCUMENT), lambda: GuildConfig.from_mapping(GUILD_DOCUMENT), 10000
+    )
+    report("encode", lambda: asdict(document), document.to_mapping, 10000)
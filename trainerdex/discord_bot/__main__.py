@@ -6,11 +6,13 @@ import os
 from discord import ApplicationContext, Bot, CheckFailure, Intents
 from discord.errors import PrivilegedIntentsRequired
 
-from trainerdex.discord_bot.config import Config
+from trainerdex.discord_bot.client import PooledClient, create_client
+from trainerdex.discord_bot.config import Config, get_config
 from trainerdex.discord_bot.constants import DEBUG, DEBUG_GUILDS
 from trainerdex.discord_bot.datatypes import Common
 from trainerdex.discord_bot.loggers import DiscordLogger, getLogger
 from trainerdex.discord_bot.modules.base import Module
+from trainerdex.discord_bot.ocr import OCRClient
 from trainerdex.discord_bot.utils import chat_formatting
 
 logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"))
@@ -20,7 +22,9 @@ private_logger: logging.Logger = logging.getLogger(__name__)
 
 async def main(loop: asyncio.AbstractEventLoop) -> None:
     private_logger.info("Initializing Config...")
-    config: Config = Config()
+    config: Config = get_config()
+    await config.setup()
+    config.start_background_tasks()
     private_logger.info("Config initialized.")
 
     private_logger.info("Initializing Pycord...")
@@ -93,10 +97,16 @@ async def main(loop: asyncio.AbstractEventLoop) -> None:
             ephemeral=True,
         )
 
+    # One TrainerDex API client, and connection pool, is shared by every module
+    client: PooledClient = create_client(loop)
+    ocr: OCRClient = OCRClient()
+
     # Construct Common dataclass
     common: Common = Common(
         bot=bot,
         config=config,
+        client=client,
+        ocr=ocr,
     )
 
     private_logger.info("Loading modules...")
@@ -118,6 +128,10 @@ async def main(loop: asyncio.AbstractEventLoop) -> None:
     except Exception as e:
         private_logger.exception(e)
         await bot.close()
+    finally:
+        await client.close()
+        await ocr.close()
+        await config.close()
 
 
 if __name__ == "__main__":
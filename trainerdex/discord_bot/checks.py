@@ -1,6 +1,6 @@
 from discord import ApplicationContext, Member
 
-from trainerdex.discord_bot.config import Config
+from trainerdex.discord_bot.config import get_config
 
 
 async def check_member_privilage(
@@ -25,5 +25,4 @@ async def check_member_privilage(
     if member.guild_permissions.administrator or member.guild_permissions.manage_guild:
         return True
 
-    config = Config()
-    return any(member.get_role(role_id) for role_id in (await config.get_guild(member.guild.id)).mod_role_ids)
+    return any(member.get_role(role_id) for role_id in (await get_config().get_guild(member.guild.id)).mod_role_ids)
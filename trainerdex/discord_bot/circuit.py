@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import logging
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import Enum
+
+from trainerdex.api.exceptions import HTTPException
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+STALE_DATA_WARNING: str = "TrainerDex is having trouble right now, so this may be out of date."
+
+
+class APIUnavailable(HTTPException):
+    """Raised when the TrainerDex API times out, can't be reached or has failed too often to be worth trying.
+
+    Subclasses `HTTPException` so callers which already handle failed requests handle this too.
+    """
+
+    def __init__(self, message: str) -> None:
+        super().__init__(None, message)
+
+    def __str__(self) -> str:
+        # args is (response, message) like any HTTPException, but there's never a response to show.
+        return self.args[1]
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+
+class CircuitBreaker:
+    """Stops sending requests after `failure_threshold` consecutive failures.
+
+    After `reset_timeout` seconds, one request is let through to probe the API, closing the circuit if it succeeds.
+    """
+
+    def __init__(self, failure_threshold: int | None = None, reset_timeout: float | None = None) -> None:
+        self.failure_threshold: int = failure_threshold or int(os.environ.get("TRAINERDEX_CIRCUIT_THRESHOLD", 5))
+        self.reset_timeout: float = reset_timeout or float(os.environ.get("TRAINERDEX_CIRCUIT_RESET_TIMEOUT", 30))
+        self.state: CircuitState = CircuitState.CLOSED
+        self.failures: int = 0
+        self.rejected: int = 0
+        self._opened_at: float = 0.0
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent now."""
+        if self.state is CircuitState.CLOSED:
+            return True
+
+        # Open, or half-open with a probe in flight. A probe is let through every `reset_timeout` seconds, so the
+        # circuit can't stay half-open if one never finishes.
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = CircuitState.HALF_OPEN
+            self._opened_at = time.monotonic()
+            return True
+
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        if self.state is not CircuitState.CLOSED:
+            logger.info("TrainerDex API recovered, closing the circuit.")
+        self.state = CircuitState.CLOSED
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state is CircuitState.HALF_OPEN or (
+            self.state is CircuitState.CLOSED and self.failures >= self.failure_threshold
+        ):
+            logger.warning(
+                "TrainerDex API failed %(failures)s times, opening the circuit for %(timeout)ss.",
+                {"failures": self.failures, "timeout": self.reset_timeout},
+            )
+            self.state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+
+@dataclass(slots=True)
+class StaleTracker:
+    stale: bool = False
+    depth: int = 0
+
+
+# Shared by every task created while a command holds the client, see `PooledClient.__aenter__`.
+stale_tracker: ContextVar[StaleTracker | None] = ContextVar("stale_tracker", default=None)
+
+
+def mark_stale() -> None:
+    """Record that data served to the current command came from a cache because the API was unavailable."""
+    if (tracker := stale_tracker.get()) is not None:
+        tracker.stale = True
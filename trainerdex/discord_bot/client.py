@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass
+from types import TracebackType
+from typing import Any
+
+from aiohttp import ClientError, ClientSession, ClientTimeout, TCPConnector
+from aiohttp.typedefs import StrOrURL
+
+from trainerdex.api.client import TokenClient
+from trainerdex.api.exceptions import Forbidden, HTTPException, NotFound
+from trainerdex.api.leaderboard import CommunityLeaderboard, CountryLeaderboard, GuildLeaderboard, Leaderboard
+from trainerdex.api.socialconnection import SocialConnection
+from trainerdex.api.trainer import Trainer
+from trainerdex.api.utils import HasID
+from trainerdex.discord_bot.circuit import APIUnavailable, CircuitBreaker, StaleTracker, mark_stale, stale_tracker
+from trainerdex.discord_bot.constants import TRAINERDEX_API_TOKEN
+from trainerdex.discord_bot.leaderboards import LeaderboardCache
+from trainerdex.discord_bot.scheduler import Priority, RequestScheduler, request_priority
+from trainerdex.discord_bot.utils.cache import TTLCache
+from trainerdex.discord_bot.utils.singleflight import SingleFlight
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class PoolStats:
+    limit: int
+    limit_per_host: int
+    # Connections currently checked out by a request.
+    in_use: int
+    # Open connections waiting to be reused.
+    idle: int
+    sessions_created: int
+
+
+class PooledClient(TokenClient):
+    """A TrainerDex API client which keeps one session, and its connection pool, open for the life of the bot.
+
+    It can stand in for a per-command `TokenClient`, using it as an async context manager doesn't open or close
+    anything, it only tracks whether the command was served stale data, see `served_stale`.
+    Call `close` at shutdown.
+
+    While the API is unavailable, GET requests fail fast with `APIUnavailable`, or return the last response to an
+    identical request if there is one.
+    """
+
+    # Leaderboards are too large to keep a copy of every response, `LeaderboardCache` falls back on its own copy.
+    UNCACHED_PATHS: tuple[str, ...] = ("/api/v1/leaderboard/", "/api/v2/leaderboard/")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop | None = None) -> None:
+        super().__init__(loop=loop)
+        self.limit: int = int(os.environ.get("TRAINERDEX_POOL_SIZE", 100))
+        self.limit_per_host: int = int(os.environ.get("TRAINERDEX_POOL_SIZE_PER_HOST", 20))
+        self.keepalive_timeout: float = float(os.environ.get("TRAINERDEX_KEEPALIVE_TIMEOUT", 60))
+        self.ttl_dns_cache: int = int(os.environ.get("TRAINERDEX_DNS_CACHE_TTL", 300))
+        self.sessions_created: int = 0
+        self._session: ClientSession | None = None
+        # Identical GET requests made while one is in flight share its response.
+        self.in_flight: SingleFlight[tuple[Priority, str, str], Any] = SingleFlight()
+        # Keeps requests under the API's rate limit, see `scheduler.background_priority`.
+        self.scheduler: RequestScheduler = RequestScheduler()
+        self.breaker: CircuitBreaker = CircuitBreaker()
+        self.timeout: float = float(os.environ.get("TRAINERDEX_TIMEOUT", 5))
+        self.leaderboard_timeout: float = float(os.environ.get("TRAINERDEX_LEADERBOARD_TIMEOUT", 15))
+        self.write_timeout: float = float(os.environ.get("TRAINERDEX_WRITE_TIMEOUT", 10))
+        # The last response to each GET request, served while the API is unavailable.
+        self._last_responses: TTLCache[tuple[str, str], Any] = TTLCache(
+            maxsize=int(os.environ.get("TRAINERDEX_FALLBACK_CACHE_SIZE", 4096)),
+            ttl=float(os.environ.get("TRAINERDEX_FALLBACK_CACHE_TTL", 86400)),
+        )
+        self.leaderboards: LeaderboardCache = LeaderboardCache(
+            lambda stat, guild_id: self._v1_get_leaderboard(stat=stat, guild_id=guild_id)
+        )
+        # Discord user ID -> linked trainer ID. Users without a linked profile are remembered for less time, since
+        # they can link one on the website without the bot knowing.
+        self._trainer_ids: TTLCache[int, int] = TTLCache(
+            maxsize=int(os.environ.get("DISCORD_USER_CACHE_SIZE", 10000)),
+            ttl=float(os.environ.get("DISCORD_USER_CACHE_TTL", 3600)),
+        )
+        self._unlinked_users: TTLCache[int, bool] = TTLCache(
+            maxsize=int(os.environ.get("DISCORD_USER_CACHE_SIZE", 10000)),
+            ttl=float(os.environ.get("UNLINKED_USER_CACHE_TTL", 300)),
+        )
+
+    def _create_session(self) -> ClientSession:
+        connector: TCPConnector = TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.ttl_dns_cache,
+        )
+        self.sessions_created += 1
+        logger.info("TrainerDex API sessions created: %(count)s", {"count": self.sessions_created})
+        return ClientSession(base_url=self.HOST, headers=self.headers, connector=connector)
+
+    @property
+    def session(self) -> ClientSession:
+        # Created on first use, since the connector must be created inside the running event loop.
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    @property
+    def served_stale(self) -> bool:
+        """Whether the current command was served cached data because the API was unavailable."""
+        return (tracker := stale_tracker.get()) is not None and tracker.stale
+
+    def _get_timeout(self, method: str, path: str) -> float:
+        if method != "GET":
+            return self.write_timeout
+        if path.startswith(self.UNCACHED_PATHS):
+            return self.leaderboard_timeout
+        return self.timeout
+
+    async def request(self, method: str, path: StrOrURL, **kwargs) -> Any:
+        if method != "GET":
+            return await self._send(method, path, **kwargs)
+
+        key: tuple[str, str] = (str(path), json.dumps(kwargs, sort_keys=True, default=str))
+        # A flight waits in the scheduler at the priority of whoever started it, so interactive callers only join
+        # interactive flights. Background callers join either.
+        priority: Priority = request_priority.get()
+        if (Priority.INTERACTIVE, *key) in self.in_flight:
+            priority = Priority.INTERACTIVE
+        try:
+            data: Any = await self.in_flight.do((priority, *key), lambda: self._send(method, path, **kwargs))
+        except APIUnavailable:
+            if (data := self._last_responses.get(key)) is None:
+                raise
+            mark_stale()
+            return data
+
+        if not str(path).startswith(self.UNCACHED_PATHS):
+            self._last_responses[key] = data
+        return data
+
+    async def _send(self, method: str, path: StrOrURL, **kwargs) -> Any:
+        if not self.breaker.allow():
+            raise APIUnavailable("The TrainerDex API is unavailable, the circuit is open.")
+
+        await self.scheduler.acquire()
+        kwargs.setdefault("timeout", ClientTimeout(total=self._get_timeout(method, str(path))))
+        try:
+            data: Any = await super().request(method, path, **kwargs)
+        except HTTPException as e:
+            response, _ = e.args
+            if response is not None and response.status >= 500:
+                self.breaker.record_failure()
+                raise APIUnavailable(f"The TrainerDex API responded with {response.status}.") from e
+            self.breaker.record_success()
+            raise
+        except (asyncio.TimeoutError, ClientError) as e:
+            self.breaker.record_failure()
+            raise APIUnavailable(f"The TrainerDex API is unavailable: {e!r}") from e
+        # The API answered, so it's up.
+        except (Forbidden, NotFound):
+            self.breaker.record_success()
+            raise
+
+        self.breaker.record_success()
+        return data
+
+    def pool_stats(self) -> PoolStats:
+        connector: TCPConnector | None = self._session.connector if self._session is not None else None
+        return PoolStats(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            # aiohttp doesn't expose these publicly.
+            in_use=len(connector._acquired) if connector else 0,
+            idle=sum(len(conns) for conns in connector._conns.values()) if connector else 0,
+            sessions_created=self.sessions_created,
+        )
+
+    async def get_trainer(self, trainer_id: int, *, fetch_updates: bool = True) -> Trainer:
+        """Return a trainer, only fetching their updates if `fetch_updates` is set."""
+        trainer: Trainer = Trainer(client=self, data=await self._v1_get_trainer(trainer_id))
+        if fetch_updates:
+            await trainer.fetch_updates()
+        return trainer
+
+    async def get_leaderboard(
+        self,
+        stat: str = "total_xp",
+        guild: int | HasID | None = None,
+        community: str | None = None,
+        country: str | None = None,
+    ) -> Leaderboard | GuildLeaderboard | CommunityLeaderboard | CountryLeaderboard:
+        """Return a leaderboard, global and guild leaderboards are served from `leaderboards`."""
+        if guild is None and (community is not None or country is not None):
+            return await super().get_leaderboard(stat=stat, community=community, country=country)
+
+        guild_id: int | None = guild if guild is None or isinstance(guild, int) else guild.id
+        data: dict = await self.leaderboards.get(stat, guild_id)
+        return (Leaderboard if guild_id is None else GuildLeaderboard)(client=self, data=data)
+
+    async def get_trainer_id_for_discord_user(self, user_id: int) -> int | None:
+        """Return the ID of the trainer linked to a Discord user, or None if they haven't linked one."""
+        if (trainer_id := self._trainer_ids.get(user_id)) is not None:
+            return trainer_id
+        if self._unlinked_users.get(user_id):
+            return None
+
+        social_connections: list[SocialConnection] = await self.get_social_connections("discord", [str(user_id)])
+        if not social_connections:
+            self._unlinked_users[user_id] = True
+            return None
+
+        # SocialConnection doesn't expose the trainer's ID publicly.
+        trainer_id = self._trainer_ids[user_id] = social_connections[0]._trainer_id
+        return trainer_id
+
+    def forget_discord_user(self, user_id: int) -> None:
+        """Forget which trainer a Discord user is linked to, after linking or unlinking them."""
+        self._trainer_ids.pop(user_id)
+        self._unlinked_users.pop(user_id)
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            logger.info(
+                "Closing TrainerDex API session: %(stats)s, %(collapsed)s of %(calls)s GET requests collapsed.",
+                {"stats": self.pool_stats(), "collapsed": self.in_flight.collapsed, "calls": self.in_flight.calls},
+            )
+            await self._session.close()
+
+    async def __aenter__(self) -> PooledClient:
+        # Tasks created inside the block share the tracker, so they can mark the command as served stale data.
+        if (tracker := stale_tracker.get()) is None:
+            tracker = StaleTracker()
+            stale_tracker.set(tracker)
+        tracker.depth += 1
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        if (tracker := stale_tracker.get()) is not None:
+            tracker.depth -= 1
+            if tracker.depth <= 0:
+                stale_tracker.set(None)
+
+
+def create_client(loop: asyncio.AbstractEventLoop | None = None) -> PooledClient:
+    return PooledClient(loop=loop).authenticate(token=TRAINERDEX_API_TOKEN)
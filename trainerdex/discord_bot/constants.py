@@ -16,6 +16,8 @@ WEBSITE_DOMAIN: str = "https://trainerdex.app"
 
 TRAINERDEX_API_TOKEN: str = os.environ.get("TRAINERDEX_API_TOKEN")
 TRAINERDEX_COLOUR = Colour(13252437)
+# How many leaderboards a profile card fetches at once.
+LEADERBOARD_FAN_OUT: int = int(os.environ.get("LEADERBOARD_FAN_OUT", 5))
 
 
 class CustomEmoji(Enum):
@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-import inspect
-from dataclasses import dataclass, field
+from copy import deepcopy
+from dataclasses import MISSING, dataclass, field, fields
 from datetime import datetime
-from typing import TYPE_CHECKING, Mapping
+from typing import TYPE_CHECKING, Any, Callable, ClassVar, Mapping, TypeVar, get_origin, get_type_hints
 from uuid import UUID, uuid4
 
 from discord import Bot
@@ -12,31 +12,217 @@ from discord.role import Role
 if TYPE_CHECKING:
     from typing_extensions import Self
 
+    from trainerdex.discord_bot.client import PooledClient
     from trainerdex.discord_bot.config import Config
+    from trainerdex.discord_bot.ocr import OCRClient
 
 
-@dataclass
+class _Codec:
+    """Converts instances of a dataclass to and from the mappings stored in MongoDB.
+
+    The fields, their defaults and any nested codecs are worked out once, when the class is defined, so decoding
+    doesn't need any reflection. Decoding doesn't call `__init__` or `__post_init__`.
+    """
+
+    __slots__ = ("cls", "fields", "encoders")
+
+    def __init__(self, cls: type) -> None:
+        hints: dict[str, Any] = get_type_hints(cls)
+        self.cls: type = cls
+        self.fields: list[tuple[str, Callable | None, Any, Any]] = []
+        self.encoders: dict[str, Callable | None] = {}
+
+        for f in fields(cls):
+            if not f.metadata.get("stored", True):
+                continue
+
+            hint: Any = hints[f.name]
+            if (codec := getattr(hint, "_codec", None)) is not None:
+                decoder, encoder = codec.decode, codec.encode
+            elif hint is list or get_origin(hint) is list:
+                # Copy arrays, so neither side can mutate the other's.
+                decoder, encoder = list, list
+            else:
+                decoder, encoder = None, None
+
+            self.fields.append((f.name, decoder, f.default, f.default_factory))
+            self.encoders[f.name] = encoder
+
+    def decode(self, mapping: Mapping) -> Any:
+        instance = object.__new__(self.cls)
+        for name, decoder, default, default_factory in self.fields:
+            if (value := mapping.get(name, MISSING)) is not MISSING:
+                if decoder is not None:
+                    value = decoder(value)
+            elif default_factory is not MISSING:
+                value = default_factory()
+            elif default is not MISSING:
+                value = default
+            else:
+                raise TypeError(f"{self.cls.__name__} is missing the required field {name!r}.")
+            object.__setattr__(instance, name, value)
+        return instance
+
+    def encode(self, instance: Any) -> dict[str, Any]:
+        data: dict[str, Any] = {}
+        for name, encoder in self.encoders.items():
+            value = getattr(instance, name)
+            data[name] = value if encoder is None else encoder(value)
+        return data
+
+    def encode_field(self, name: str, value: Any) -> Any:
+        encoder: Callable | None = self.encoders[name]
+        return value if encoder is None else encoder(value)
+
+
+T = TypeVar("T")
+
+
+def _with_codec(cls: type[T]) -> type[T]:
+    cls._codec = _Codec(cls)
+    return cls
+
+
+def _unstored_field() -> Any:
+    return field(init=False, repr=False, compare=False, metadata={"stored": False})
+
+
+@_with_codec
+@dataclass(slots=True)
 class StoredRoles:
+    _codec: ClassVar[_Codec]
+
     add: list[int] = field(default_factory=list)
     remove: list[int] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class TransformedRoles:
     add: list[Role] = field(default_factory=list)
     remove: list[Role] = field(default_factory=list)
 
 
-@dataclass
+@dataclass(slots=True)
 class _MongoDBDocument:
+    """A document stored in MongoDB, which records the changes made to it since it was loaded.
+
+    Assigning to a field marks the whole field as modified. Array fields, including nested ones such as
+    `roles_to_assign_on_approval.add`, should be modified with `add_to_set` and `pull` so that only the
+    changed elements are written.
+    """
+
+    _codec: ClassVar[_Codec]
+
     _id: int
+    _modified: set[str] = _unstored_field()
+    _added: dict[str, list] = _unstored_field()
+    _pulled: dict[str, list] = _unstored_field()
+
+    def __post_init__(self) -> None:
+        # Documents which weren't loaded from the database haven't been written at all.
+        object.__setattr__(self, "_modified", set(self._codec.encoders))
+        object.__setattr__(self, "_added", {})
+        object.__setattr__(self, "_pulled", {})
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        object.__setattr__(self, name, value)
+        if name in self._codec.encoders:
+            try:
+                self._modified.add(name)
+            except AttributeError:
+                # Still in `__init__`, `__post_init__` will mark every field as modified.
+                pass
+
+    def __deepcopy__(self, memo: dict) -> Self:
+        # Copy the slots directly, assigning them would mark every field as modified.
+        document = object.__new__(type(self))
+        for f in fields(self):
+            object.__setattr__(document, f.name, deepcopy(getattr(self, f.name), memo))
+        return document
 
     @classmethod
     def from_mapping(cls, mapping: Mapping) -> Self:
-        return cls(**{k: v for k, v in mapping.items() if k in inspect.signature(cls).parameters})
-
-
-@dataclass(frozen=True)
+        document = cls._codec.decode(mapping)
+        document.mark_saved()
+        return document
+
+    def to_mapping(self) -> dict[str, Any]:
+        return self._codec.encode(self)
+
+    def _get_array(self, path: str) -> list:
+        value = self
+        for name in path.split("."):
+            value = getattr(value, name)
+        return value
+
+    def add_to_set(self, path: str, value: Any) -> None:
+        """Add `value` to the array at `path` unless it's already present."""
+        array: list = self._get_array(path)
+        if value in array:
+            return
+        array.append(value)
+
+        if value in (pulled := self._pulled.get(path, [])):
+            pulled.remove(value)
+        else:
+            self._added.setdefault(path, []).append(value)
+
+    def pull(self, path: str, value: Any) -> None:
+        """Remove every occurrence of `value` from the array at `path`."""
+        array: list = self._get_array(path)
+        if value not in array:
+            return
+        while value in array:
+            array.remove(value)
+
+        if value in (added := self._added.get(path, [])):
+            added.remove(value)
+        else:
+            self._pulled.setdefault(path, []).append(value)
+
+    def get_update(self) -> dict[str, dict[str, Any]]:
+        """Return a MongoDB update document which applies the changes made since this document was loaded."""
+        set_: dict[str, Any] = {
+            name: self._codec.encode_field(name, getattr(self, name)) for name in self._modified if name != "_id"
+        }
+        add_to_set: dict[str, dict[str, list]] = {}
+        pull: dict[str, dict[str, list]] = {}
+
+        for path in self._added.keys() | self._pulled.keys():
+            if path.split(".")[0] in self._modified:
+                continue
+
+            added, pulled = self._added.get(path), self._pulled.get(path)
+            if added and pulled:
+                # MongoDB won't apply both operators to the same path in one update.
+                set_[path] = self._get_array(path).copy()
+            elif added:
+                add_to_set[path] = {"$each": added.copy()}
+            elif pulled:
+                pull[path] = {"$in": pulled.copy()}
+
+        # A new document must be inserted even if `_id` is its only field.
+        set_on_insert: dict[str, Any] = {"_id": self._id} if "_id" in self._modified and self._id is not None else {}
+
+        return {
+            operator: values
+            for operator, values in (
+                ("$set", set_),
+                ("$setOnInsert", set_on_insert),
+                ("$addToSet", add_to_set),
+                ("$pull", pull),
+            )
+            if values
+        }
+
+    def mark_saved(self) -> None:
+        """Forget the changes made to this document, after they've been written."""
+        object.__setattr__(self, "_modified", set())
+        object.__setattr__(self, "_added", {})
+        object.__setattr__(self, "_pulled", {})
+
+
+@dataclass(frozen=True, slots=True)
 class GlobalConfig:
     embed_footer: str = "TrainerDex will be shutting down on the 31st December 2023"
     notice: str | None = """After careful consideration, we have reached a difficult decision. We will be winding down TrainerDex, and this process will be completed on <t:1704067199:D>.
@@ -47,7 +233,8 @@ Thank you for being part of the TrainerDex community. It's been an incredible jo
 """.strip()
 
 
-@dataclass
+@_with_codec
+@dataclass(slots=True)
 class ModuleMeta(_MongoDBDocument):
     _id: str
     enabled: bool = True
@@ -58,7 +245,8 @@ class ModuleMeta(_MongoDBDocument):
         return self._id
 
 
-@dataclass
+@_with_codec
+@dataclass(slots=True)
 class GuildConfig(_MongoDBDocument):
     assign_roles_on_join: bool = True
     set_nickname_on_join: bool = True
@@ -77,28 +265,25 @@ class GuildConfig(_MongoDBDocument):
 
     mod_role_ids: list[int] = field(default_factory=list)
 
-    @classmethod
-    def from_mapping(cls, mapping: Mapping) -> Self:
-        mapping = dict(mapping)
-        mapping["roles_to_assign_on_approval"] = StoredRoles(**mapping.pop("roles_to_assign_on_approval", {}))
-        return cls(**{k: v for k, v in mapping.items() if k in inspect.signature(cls).parameters})
-
     @property
     def is_eligible_for_leaderboard(self) -> bool:
         return self.post_weekly_leaderboards and self.leaderboard_channel_id is not None
 
 
-@dataclass
+@_with_codec
+@dataclass(slots=True)
 class ChannelConfig(_MongoDBDocument):
     pass
 
 
-@dataclass
+@_with_codec
+@dataclass(slots=True)
 class UserConfig(_MongoDBDocument):
     pass
 
 
-@dataclass
+@_with_codec
+@dataclass(slots=True)
 class MemberConfig(UserConfig):
     _uid: UUID
     user_id: int
@@ -109,7 +294,9 @@ class MemberConfig(UserConfig):
         return cls(uuid=uuid4(), *args, **kwargs)
 
 
-@dataclass
+@dataclass(slots=True)
 class Common:
     bot: Bot
     config: Config
+    client: PooledClient
+    ocr: OCRClient
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import datetime
+import logging
 from decimal import Decimal
 from typing import TYPE_CHECKING
 
@@ -11,18 +13,20 @@ from discord.embeds import Embed, EmptyEmbed
 from discord.guild import Guild
 from discord.message import Message
 
-from trainerdex.api.client import TokenClient
-from trainerdex.api.exceptions import HTTPException
+from trainerdex.api.exceptions import Forbidden, HTTPException, NotFound
 from trainerdex.api.update import Update
-from trainerdex.discord_bot.constants import TRAINERDEX_COLOUR, WEBSITE_DOMAIN, CustomEmoji
+from trainerdex.discord_bot.constants import LEADERBOARD_FAN_OUT, TRAINERDEX_COLOUR, WEBSITE_DOMAIN, CustomEmoji
+from trainerdex.discord_bot.scheduler import background_priority
 from trainerdex.discord_bot.utils import chat_formatting
 from trainerdex.discord_bot.utils.deadlines import get_last_deadline, get_next_deadline
 from trainerdex.discord_bot.utils.general import google_calendar_link_for_datetime
 
 if TYPE_CHECKING:
-    from trainerdex.api.leaderboard import GuildLeaderboard, Leaderboard, LeaderboardEntry
     from trainerdex.api.trainer import Trainer
     from trainerdex.discord_bot.datatypes import Common, GlobalConfig
+    from trainerdex.discord_bot.leaderboards import Rank
+
+logger: logging.Logger = logging.getLogger(__name__)
 
 
 class BaseCard(Embed):
@@ -39,6 +43,7 @@ class BaseCard(Embed):
         **kwargs,
     ) -> None:
         super().__init__(**kwargs)
+        self._common: Common = common
         global_config: GlobalConfig = await common.config.get_global()
         self.colour: Colour | int = kwargs.get(
             "colour",
@@ -145,70 +150,79 @@ class ProfileCard(BaseCard):
                 inline=False,
             )
 
-    async def add_guild_leaderboard(self, guild: Guild) -> None:
-        entries: list[str] = []
-        stats: list[str] = [
-            "badge_travel_km",
-            "badge_capture_total",
-            "badge_pokestops_visited",
-            "total_xp",
-            "gymbadges_gold",
-        ]
-        for stat in stats:
-            async with TokenClient() as client:
+    async def _get_ranks(self, leaderboards: list[tuple[str, int | None]]) -> list[Rank | None]:
+        """Look up the trainer's rank on each `(stat, guild_id)` leaderboard.
+
+        At most `LEADERBOARD_FAN_OUT` are looked up at a time. A leaderboard which fails to load gives None, like one
+        the trainer isn't on.
+        """
+        semaphore: asyncio.Semaphore = asyncio.Semaphore(LEADERBOARD_FAN_OUT)
+
+        async def get_rank(stat: str, guild_id: int | None) -> Rank | None:
+            # Leaderboards are nice to have, the trainer's own stats are already on the card.
+            async with semaphore:
                 try:
-                    leaderboard: GuildLeaderboard = await client.get_leaderboard(
-                        guild=guild,
-                        stat=stat,
-                    )
-                except HTTPException:
-                    return
-                entry: LeaderboardEntry = await leaderboard.find(lambda x: x.trainer_id == self.trainer.id)
-                if entry:
-                    entries.append(
-                        "{} {}".format(
-                            CustomEmoji[stat.upper()].value,
-                            chat_formatting.format_numbers(entry.position),
-                        )
+                    with background_priority():
+                        return await self._common.client.leaderboards.get_rank(stat, guild_id, self.trainer.id)
+                except (HTTPException, NotFound, Forbidden):
+                    logger.warning(
+                        "Failed to load the %(stat)s leaderboard for guild %(guild_id)s.",
+                        {"stat": stat, "guild_id": guild_id},
                     )
+                    return None
 
-        if entries:
-            self.insert_field_at(
-                index=0,
-                name=f"{guild.name} Leaderboard (All)",
-                value="\n".join(entries),
+        return await asyncio.gather(*(get_rank(stat, guild_id) for stat, guild_id in leaderboards))
+
+    @staticmethod
+    def _format_ranks(stats: list[str], ranks: list[Rank | None]) -> list[str]:
+        return [
+            "{} {}".format(
+                CustomEmoji[stat.upper()].value,
+                chat_formatting.format_numbers(rank.position),
             )
+            for stat, rank in zip(stats, ranks)
+            if rank
+        ]
 
-    async def add_leaderboard(self) -> None:
-        entries: list[str] = []
-        stats: list[str] = [
+    async def add_leaderboards(self, guild: Guild | None = None) -> None:
+        """Add the trainer's global leaderboard ranks, and their ranks in `guild` if provided.
+
+        Every leaderboard is fetched concurrently.
+        """
+        global_stats: list[str] = [
             "badge_travel_km",
             "badge_capture_total",
             "badge_pokestops_visited",
             "total_xp",
         ]
-        for stat in stats:
-            async with TokenClient() as client:
-                try:
-                    leaderboard: Leaderboard = await client.get_leaderboard(stat=stat)
-                except HTTPException:
-                    return
-                entry: LeaderboardEntry = await leaderboard.find(lambda x: x.trainer_id == self.trainer.id)
-                if entry:
-                    entries.append(
-                        "{} {}".format(
-                            CustomEmoji[stat.upper()].value,
-                            chat_formatting.format_numbers(entry.position),
-                        )
-                    )
+        guild_stats: list[str] = [
+            "badge_travel_km",
+            "badge_capture_total",
+            "badge_pokestops_visited",
+            "total_xp",
+            "gymbadges_gold",
+        ]
+
+        leaderboards: list[tuple[str, int | None]] = [(stat, None) for stat in global_stats]
+        if guild:
+            leaderboards += [(stat, guild.id) for stat in guild_stats]
+        ranks: list[Rank | None] = await self._get_ranks(leaderboards)
+        global_count: int = len(global_stats)
 
-        if entries:
+        if entries := self._format_ranks(global_stats, ranks[:global_count]):
             self.insert_field_at(
                 index=0,
                 name=f"{CustomEmoji.GLOBAL.value} Leaderboard (Top 1000)",
                 value="\n".join(entries),
             )
 
+        if entries := self._format_ranks(guild_stats, ranks[global_count:]):
+            self.insert_field_at(
+                index=0,
+                name=f"{guild.name} Leaderboard (All)",
+                value="\n".join(entries),
+            )
+
     async def show_progress(self) -> None:
         this_update: Update = self.update
 
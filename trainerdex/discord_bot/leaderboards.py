@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+from trainerdex.discord_bot.circuit import APIUnavailable, mark_stale
+from trainerdex.discord_bot.scheduler import background_priority
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+LeaderboardKey = tuple[str, int | None]
+
+
+@dataclass(frozen=True, slots=True)
+class Rank:
+    position: int
+    value: int | float
+
+
+@dataclass(slots=True)
+class _CachedLeaderboard:
+    data: dict[str, Any]
+    fetched_at: float
+    rows: int
+    # Each trainer's rank, built once when the leaderboard is fetched so lookups don't scan the entries.
+    ranks: dict[int, Rank]
+
+
+class LeaderboardCache:
+    """Caches leaderboard data from the TrainerDex API, keyed on stat and guild (None for the global leaderboard).
+
+    Leaderboards younger than `ttl` seconds are served from the cache. For `stale_ttl` seconds after that they're
+    still served, while a single background request refreshes them. The least recently used leaderboards are evicted
+    once the cache holds more than `max_rows` entries across every leaderboard.
+
+    The cached data is shared between callers, so it must not be mutated.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str, int | None], Awaitable[dict[str, Any]]],
+        *,
+        ttl: float | None = None,
+        stale_ttl: float | None = None,
+        max_rows: int | None = None,
+    ) -> None:
+        self._fetch: Callable[[str, int | None], Awaitable[dict[str, Any]]] = fetch
+        self.ttl: float = ttl if ttl is not None else float(os.environ.get("LEADERBOARD_CACHE_TTL", 60))
+        self.stale_ttl: float = (
+            stale_ttl if stale_ttl is not None else float(os.environ.get("LEADERBOARD_CACHE_STALE_TTL", 300))
+        )
+        self.max_rows: int = max_rows or int(os.environ.get("LEADERBOARD_CACHE_MAX_ROWS", 50000))
+        self.rows: int = 0
+        self.hits: int = 0
+        self.stale_hits: int = 0
+        self.misses: int = 0
+        self._leaderboards: OrderedDict[LeaderboardKey, _CachedLeaderboard] = OrderedDict()
+        self._loading: dict[LeaderboardKey, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._leaderboards)
+
+    async def get(self, stat: str, guild_id: int | None = None) -> dict[str, Any]:
+        return (await self._get(stat, guild_id)).data
+
+    async def get_rank(self, stat: str, guild_id: int | None, trainer_id: int) -> Rank | None:
+        """Return the trainer's rank on a leaderboard, or None if they aren't on it."""
+        return (await self._get(stat, guild_id)).ranks.get(trainer_id)
+
+    async def _get(self, stat: str, guild_id: int | None) -> _CachedLeaderboard:
+        key: LeaderboardKey = (stat, guild_id)
+        if (cached := self._leaderboards.get(key)) is not None:
+            age: float = time.monotonic() - cached.fetched_at
+            if age < self.ttl + self.stale_ttl:
+                self._leaderboards.move_to_end(key)
+                if age < self.ttl:
+                    self.hits += 1
+                else:
+                    self.stale_hits += 1
+                    if key not in self._loading:
+                        with background_priority():
+                            self._load(key).add_done_callback(self._log_failed_refresh)
+                return cached
+
+        self.misses += 1
+        try:
+            # Shielded, so a cancelled caller doesn't cancel the request for everyone else waiting on it.
+            return await asyncio.shield(self._load(key))
+        except APIUnavailable:
+            # However old it is, a leaderboard is more use than an error.
+            if cached is None:
+                raise
+            mark_stale()
+            return cached
+
+    def invalidate(self, stat: str | None = None, guild_id: int | None = None) -> None:
+        """Forget cached leaderboards for `stat` and `guild_id`, or every leaderboard if neither is provided."""
+        for key in [key for key in self._leaderboards if stat in (None, key[0]) and guild_id in (None, key[1])]:
+            self.rows -= self._leaderboards.pop(key).rows
+
+    def _load(self, key: LeaderboardKey) -> asyncio.Task:
+        """Return the request in progress for `key`, starting one if there isn't one."""
+        if (task := self._loading.get(key)) is None:
+            task = self._loading[key] = asyncio.create_task(self._request(key))
+        return task
+
+    async def _request(self, key: LeaderboardKey) -> _CachedLeaderboard:
+        try:
+            data: dict[str, Any] = await self._fetch(*key)
+        finally:
+            del self._loading[key]
+
+        return self._store(key, data)
+
+    def _store(self, key: LeaderboardKey, data: dict[str, Any]) -> _CachedLeaderboard:
+        if (previous := self._leaderboards.pop(key, None)) is not None:
+            self.rows -= previous.rows
+
+        entries: list[dict[str, Any]] = data.get("leaderboard", [])
+        cached: _CachedLeaderboard = _CachedLeaderboard(
+            data=data,
+            fetched_at=time.monotonic(),
+            rows=len(entries),
+            ranks={entry["id"]: Rank(position=entry["position"], value=entry["value"]) for entry in entries},
+        )
+        self._leaderboards[key] = cached
+        self.rows += cached.rows
+        while self.rows > self.max_rows and len(self._leaderboards) > 1:
+            self.rows -= self._leaderboards.popitem(last=False)[1].rows
+        return cached
+
+    @staticmethod
+    def _log_failed_refresh(task: asyncio.Task) -> None:
+        if not task.cancelled() and (exception := task.exception()) is not None:
+            logger.warning("Failed to refresh a stale leaderboard.", exc_info=exception)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Mapping
+
+if TYPE_CHECKING:
+    from trainerdex.discord_bot.config import Config
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+SCHEMA_DOCUMENT_ID: str = "schema"
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[Config], Awaitable[None]]
+
+
+MIGRATIONS: list[Migration] = []
+
+
+def migration(version: int, description: str) -> Callable[[Callable[[Config], Awaitable[None]]], Migration]:
+    """Register a migration, which must be idempotent in case it's interrupted before the version is recorded."""
+
+    def decorator(func: Callable[[Config], Awaitable[None]]) -> Migration:
+        assert all(m.version < version for m in MIGRATIONS), "Migrations must be registered in order."
+        MIGRATIONS.append(instance := Migration(version, description, func))
+        return instance
+
+    return decorator
+
+
+async def get_schema_version(config: Config) -> int:
+    data: Mapping[str, Any] | None = await config.backend.find_one("migrations", {"_id": SCHEMA_DOCUMENT_ID})
+    return data["version"] if data else 0
+
+
+async def migrate(config: Config) -> None:
+    """Apply every migration newer than the stored schema version, in order."""
+    version: int = await get_schema_version(config)
+
+    for pending in (m for m in MIGRATIONS if m.version > version):
+        logger.info(
+            "Applying migration %(version)s: %(description)s",
+            {"version": pending.version, "description": pending.description},
+        )
+        start: float = time.perf_counter()
+        await pending.apply(config)
+        await config.backend.upsert(
+            "migrations",
+            {"_id": SCHEMA_DOCUMENT_ID},
+            {"$set": {"version": pending.version}},
+        )
+        logger.info(
+            "Applied migration %(version)s in %(duration).2fs.",
+            {"version": pending.version, "duration": time.perf_counter() - start},
+        )
+
+
+@migration(1, "Remove duplicate member documents")
+async def remove_duplicate_members(config: Config) -> None:
+    # Members used to be inserted without being awaited, racing any concurrent lookups for the same member.
+    # Keep the oldest document for each user and guild so a unique index can be built.
+    documents = config.backend.find(
+        "members",
+        {},
+        sort=("user_id", "guild_id", "_id"),
+        batch_size=config.batch_size,
+    )
+
+    previous_key: tuple[int, int] | None = None
+    duplicates: list[Any] = []
+    removed: int = 0
+    async for document in documents:
+        key: tuple[int, int] = (document.get("user_id"), document.get("guild_id"))
+        if key == previous_key:
+            duplicates.append(document["_id"])
+        previous_key = key
+
+        if len(duplicates) >= config.batch_size:
+            removed += await config.backend.delete_many("members", {"_id": {"$in": duplicates}})
+            duplicates.clear()
+
+    if duplicates:
+        removed += await config.backend.delete_many("members", {"_id": {"$in": duplicates}})
+
+    logger.info("Removed %(removed)s duplicate member documents.", {"removed": removed})
@@ -1,18 +1,16 @@
 import logging
 from typing import TYPE_CHECKING, NoReturn
 
-import pymongo.errors
 from discord import Bot, Cog
 from discord.utils import utcnow
 
-from trainerdex.api.client import TokenClient
-from trainerdex.discord_bot.constants import TRAINERDEX_API_TOKEN
 from trainerdex.discord_bot.exceptions import ModuleHealthCheckException
 from trainerdex.discord_bot.loggers import getLogger
 
 if TYPE_CHECKING:
+    from trainerdex.discord_bot.client import PooledClient
     from trainerdex.discord_bot.config import Config
-    from trainerdex.discord_bot.datatypes import Common, ModuleMeta
+    from trainerdex.discord_bot.datatypes import Common
 
 
 class Module(Cog):
@@ -32,8 +30,8 @@ class Module(Cog):
     def METADATA_ID(cls) -> str:
         raise NotImplementedError
 
-    def client(self) -> TokenClient:
-        return TokenClient(loop=self.bot.loop).authenticate(token=TRAINERDEX_API_TOKEN)
+    def client(self) -> "PooledClient":
+        return self._common.client
 
     async def __post_init__(self) -> None:
         try:
@@ -44,13 +42,7 @@ class Module(Cog):
             return
 
         self.private_logger.info("Module successfully initialized.")
-
-        try:
-            _meta: ModuleMeta = await self.config.get_module_metadata(self)
-            _meta.last_loaded = utcnow()
-            await self.config.set_module_metadata(_meta)
-        except pymongo.errors.PyMongoError:
-            self.private_logger.exception("Failed to update module metadata.")
+        self.config.set_module_loaded(self, utcnow())
 
     async def _healthcheck(self) -> NoReturn | None:
         ...
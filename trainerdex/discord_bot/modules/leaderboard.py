@@ -1,27 +1,30 @@
 from __future__ import annotations
 
-from asyncio import gather
-from datetime import date, datetime, time
+import asyncio
+from datetime import datetime, timedelta
 from enum import Enum
 from typing import TYPE_CHECKING
-from zoneinfo import ZoneInfo
 
-import aiohttp
-from dateutil.relativedelta import MO, relativedelta
+from dateutil.relativedelta import relativedelta
 from discord import Guild, Message, Thread
 from discord.commands import ApplicationContext, Option, OptionChoice, slash_command
-from discord.ext import tasks
-from yarl import URL
 
-from trainerdex.discord_bot.constants import TRAINERDEX_API_TOKEN, Stats
+from trainerdex.discord_bot.circuit import STALE_DATA_WARNING
+from trainerdex.discord_bot.constants import Stats
 from trainerdex.discord_bot.modules.base import Module
-from trainerdex.discord_bot.utils.chat_formatting import format_time
+from trainerdex.discord_bot.scheduler import background_priority
+from trainerdex.discord_bot.utils.chat_formatting import format_time, warning
+from trainerdex.discord_bot.utils.deadlines import DeadlineQueue, get_next_deadline
 from trainerdex.discord_bot.views.gains_leaderboard import GainsLeaderboardView
 from trainerdex.discord_bot.views.leaderboard import LeaderboardView
 
 if TYPE_CHECKING:
     from trainerdex.api.leaderboard import BaseLeaderboard
-    from trainerdex.discord_bot.datatypes import GuildConfig
+    from trainerdex.discord_bot.datatypes import Common, GuildConfig
+
+
+# Seconds to wait before retrying, when the guild configs for weekly leaderboards can't be loaded.
+WEEKLY_LEADERBOARD_RETRY_DELAY: float = 60
 
 
 class LeaderboardType(Enum):
@@ -35,12 +38,23 @@ class LeaderboardModule(Module):
     def METADATA_ID(cls) -> str:
         return "LeaderboardCog"
 
+    def __init__(self, common: Common) -> None:
+        super().__init__(common)
+        # Guild ID -> when its next weekly leaderboard is due.
+        self._weekly_leaderboards: DeadlineQueue[int] = DeadlineQueue()
+        self._weekly_leaderboards_task: asyncio.Task | None = None
+        self._posting: set[asyncio.Task] = set()
+        # Guild ID -> the deadline of a weekly leaderboard which is being retried, see `_post_weekly_leaderboards`.
+        self._retrying: dict[int, datetime] = {}
+
     async def __post_init__(self) -> None:
-        self._gather_guilds_for_weekly_leaderboards.start()
+        self._weekly_leaderboards_task = asyncio.create_task(self._post_weekly_leaderboards())
+        self._weekly_leaderboards_task.add_done_callback(self._on_weekly_leaderboards_stopped)
         return await super().__post_init__()
 
     def cog_unload(self) -> None:
-        self._gather_guilds_for_weekly_leaderboards.cancel()
+        if self._weekly_leaderboards_task is not None:
+            self._weekly_leaderboards_task.cancel()
         return super().cog_unload()
 
     @slash_command(
@@ -84,79 +98,155 @@ class LeaderboardModule(Module):
             else:
                 paginator = await LeaderboardView.create(ctx, leaderboard_data)
                 await paginator.respond(ctx.interaction)
+                if client.served_stale:
+                    await ctx.respond(warning(STALE_DATA_WARNING))
+
+    async def schedule_weekly_leaderboard(self, guild_config: GuildConfig) -> None:
+        """Schedule the guild's next weekly leaderboard, or unschedule it if the guild no longer posts them.
+
+        This must be called whenever a setting which affects the weekly leaderboard changes.
+        """
+        self._retrying.pop(guild_config._id, None)
+        if guild_config.is_eligible_for_leaderboard:
+            self._weekly_leaderboards.schedule(guild_config._id, await get_next_deadline(guild_config=guild_config))
+        else:
+            self._weekly_leaderboards.remove(guild_config._id)
+
+    async def _schedule_eligible_guilds(self) -> None:
+        """Schedule every eligible guild's next weekly leaderboard, retrying until their configs can be loaded."""
+        while True:
+            try:
+                guild_configs: list[GuildConfig] = [
+                    guild_config
+                    async for guild_config in self.config.get_guilds_eligible_for_leaderboard(self.bot.guilds)
+                ]
+            except Exception:
+                self.private_logger.exception(
+                    "Failed to load guilds for weekly leaderboards, retrying in %(delay)ss.",
+                    {"delay": WEEKLY_LEADERBOARD_RETRY_DELAY},
+                )
+                await asyncio.sleep(WEEKLY_LEADERBOARD_RETRY_DELAY)
+            else:
+                break
+
+        for guild_config in guild_configs:
+            try:
+                await self.schedule_weekly_leaderboard(guild_config)
+            except Exception:
+                self.private_logger.exception(
+                    "Failed to schedule the weekly leaderboard for guild %(guild_id)s.",
+                    {"guild_id": guild_config._id},
+                )
 
-    @tasks.loop(time=[time(x) for x in range(24)])
-    # @tasks.loop(minutes=1)
-    async def _gather_guilds_for_weekly_leaderboards(self):
-        enabled_guilds = {}
-
-        for guild in self.bot.guilds:
-            guild_config = await self.config.get_guild(guild)
-            if guild_config.is_eligible_for_leaderboard:
-                enabled_guilds[guild] = guild_config
-
-        gather(
-            *(self._post_weekly_leaderboard(guild, guild_config) for guild, guild_config in enabled_guilds.items())
-        )
-
-    @_gather_guilds_for_weekly_leaderboards.before_loop
-    async def loop_wait(self):
+    async def _post_weekly_leaderboards(self) -> None:
+        """Post each guild's weekly leaderboard when it's due, sleeping until the next one in between."""
         await self.bot.wait_until_ready()
+        await self._schedule_eligible_guilds()
+
+        while True:
+            guild_id, deadline = await self._weekly_leaderboards.wait()
+            # A retry is posted as the leaderboard for the deadline which was missed.
+            deadline = self._retrying.pop(guild_id, deadline)
+
+            try:
+                await self._start_weekly_leaderboard(guild_id, deadline)
+            except Exception:
+                self.private_logger.exception(
+                    "Failed to start the weekly leaderboard for guild %(guild_id)s, retrying in %(delay)ss.",
+                    {"guild_id": guild_id, "delay": WEEKLY_LEADERBOARD_RETRY_DELAY},
+                )
+                if guild_id not in self._weekly_leaderboards:
+                    self._retrying[guild_id] = deadline
+                    self._weekly_leaderboards.schedule(
+                        guild_id,
+                        datetime.now(tz=deadline.tzinfo) + timedelta(seconds=WEEKLY_LEADERBOARD_RETRY_DELAY),
+                    )
 
-    async def _post_weekly_leaderboard(self, guild: Guild, config: GuildConfig):
-        guild_timezone = ZoneInfo(config.timezone or "UTC")
+    async def _start_weekly_leaderboard(self, guild_id: int, deadline: datetime) -> None:
+        # The config may have changed in another process since the deadline was scheduled.
+        try:
+            guild_config: GuildConfig = await self.config.get_guild(guild_id, create=False)
+        except ValueError:
+            return
+        await self.schedule_weekly_leaderboard(guild_config)
+
+        if not guild_config.is_eligible_for_leaderboard or (guild := self.bot.get_guild(guild_id)) is None:
+            return
+
+        # Posting's API requests wait behind any made by interactive commands.
+        with background_priority():
+            task: asyncio.Task = asyncio.create_task(self._post_weekly_leaderboard(guild, guild_config, deadline))
+        self._posting.add(task)
+        task.add_done_callback(self._on_weekly_leaderboard_posted)
+
+    def _on_weekly_leaderboards_stopped(self, task: asyncio.Task) -> None:
+        if task.cancelled():
+            return
+        if (exception := task.exception()) is not None:
+            self.private_logger.error("Weekly leaderboards stopped.", exc_info=exception)
+        else:
+            self.private_logger.error("Weekly leaderboards stopped.")
+
+    def _on_weekly_leaderboard_posted(self, task: asyncio.Task) -> None:
+        self._posting.discard(task)
+        if not task.cancelled() and (exception := task.exception()) is not None:
+            self.private_logger.error("Failed to post a weekly leaderboard.", exc_info=exception)
+
+    async def _post_weekly_leaderboard(self, guild: Guild, config: GuildConfig, minuend_datetime: datetime):
         leaderboard_channel = self.bot.get_channel(config.leaderboard_channel_id)
 
-        local_time = datetime.now(tz=guild_timezone)
+        local_time = datetime.now(tz=minuend_datetime.tzinfo)
 
-        if local_time.hour == 12 and (local_time.weekday() == 0 or local_time.date() == date(2022, 8, 10)):
-            minuend_datetime = local_time + relativedelta(hour=12, minute=0, second=0, microsecond=0)
-            subtrahend_datetime = minuend_datetime - relativedelta(weeks=1)
-            deadline = minuend_datetime + relativedelta(days=1, weekday=MO)
+        subtrahend_datetime = minuend_datetime - relativedelta(weeks=1)
+        deadline = minuend_datetime + relativedelta(weeks=1)
 
-            leaderboard_data: dict[Stats, dict] = {
-                stat: (
-                    await self._get_gains_leaderboard_data(
-                        guild.id, stat.value[0], subtrahend_datetime, minuend_datetime
-                    )
+        leaderboard_data: dict[Stats, dict] = {
+            stat: (
+                await self._get_gains_leaderboard_data(
+                    guild.id, stat.value[0], subtrahend_datetime, minuend_datetime
                 )
-                for stat in (
-                    Stats.TOTAL_XP,
-                    Stats.TRAVEL_KM,
-                    Stats.CAPTURE_TOTAL,
-                    Stats.POKESTOPS_VISITED,
-                    Stats.GYM_GOLD,
-                )
-            }
-            combo_post = GainsLeaderboardView.format_combo_embed(leaderboard_data, minuend_datetime)
-
-            message: Message = await leaderboard_channel.send(
-                (
-                    f"It's {format_time(local_time)}, time to post the weekly leaderboard! "
-                    f"The next leaderboard will be posted at {format_time(deadline)}."
-                ),
-                embed=combo_post,
             )
-            thread: Thread = await message.create_thread(
-                name=f"{minuend_datetime.date().isoformat()} Weekly Leaderboards"
+            for stat in (
+                Stats.TOTAL_XP,
+                Stats.TRAVEL_KM,
+                Stats.CAPTURE_TOTAL,
+                Stats.POKESTOPS_VISITED,
+                Stats.GYM_GOLD,
             )
+        }
+        combo_post = GainsLeaderboardView.format_combo_embed(leaderboard_data, minuend_datetime)
+
+        message: Message = await leaderboard_channel.send(
+            (
+                f"It's {format_time(local_time)}, time to post the weekly leaderboard! "
+                f"The next leaderboard will be posted at {format_time(deadline)}."
+            ),
+            embed=combo_post,
+        )
+        thread: Thread = await message.create_thread(
+            name=f"{minuend_datetime.date().isoformat()} Weekly Leaderboards"
+        )
 
-            for gains_data in leaderboard_data.values():
-                embeds = GainsLeaderboardView.get_pages(gains_data)
+        for gains_data in leaderboard_data.values():
+            embeds = GainsLeaderboardView.get_pages(gains_data)
 
-                for embed in embeds:
-                    await thread.send(embed=embed)
+            for embed in embeds:
+                await thread.send(embed=embed)
 
     async def _get_gains_leaderboard_data(
         self, guild_id: int, stat: str, subtrahend_datetime: datetime, minuend_datetime: datetime
     ) -> dict:
-        async with aiohttp.ClientSession(headers={"Authorization": f"Token {TRAINERDEX_API_TOKEN}"}) as session:
-            url = URL("https://trainerdex.app/api/v2/leaderboard/?mode=gain&subset=discord&limit=25")
-            url %= {
-                "guild_id": guild_id,
-                "stat": stat,
-                "subtrahend_datetime": subtrahend_datetime.isoformat(),
-                "minuend_datetime": minuend_datetime.isoformat(),
-            }
-            async with session.get(url) as response:
-                return await response.json()
+        async with self.client() as client:
+            return await client.request(
+                "GET",
+                "/api/v2/leaderboard/",
+                params={
+                    "mode": "gain",
+                    "subset": "discord",
+                    "limit": 25,
+                    "guild_id": guild_id,
+                    "stat": stat,
+                    "subtrahend_datetime": subtrahend_datetime.isoformat(),
+                    "minuend_datetime": minuend_datetime.isoformat(),
+                },
+            )
@@ -249,6 +249,7 @@ class ModerationModule(Module):
                             username=nickname, faction=team, verified=True
                         )
                         await (await trainer.get_user()).add_discord(member)
+                        client.forget_discord_user(member.id)
                     except ClientResponseError as e:
                         actions_commited.append(f"Failed to create trainer: {e}")
                     else:
@@ -300,7 +301,5 @@ class ModerationModule(Module):
                     await response.edit(embed=embed)
                     await embed.show_progress()
                     await response.edit(embed=embed)
-                    await embed.add_leaderboard()
-                    await response.edit(embed=embed)
-                    await embed.add_guild_leaderboard(ctx.guild)
+                    await embed.add_leaderboards(ctx.guild)
                     await response.edit(embed=embed)
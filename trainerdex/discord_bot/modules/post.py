@@ -1,6 +1,7 @@
+import asyncio
 import datetime
 from decimal import Decimal
-from typing import TYPE_CHECKING, Dict
+from typing import TYPE_CHECKING, Any, Dict
 
 from discord import ApplicationContext, Attachment, Option, slash_command
 from discord.utils import snowflake_time
@@ -9,7 +10,8 @@ from trainerdex.api.exceptions import HTTPException
 from trainerdex.discord_bot.constants import STAT_MAP
 from trainerdex.discord_bot.modules.base import Module
 from trainerdex.discord_bot.modules.profile import ProfileModule
-from trainerdex.discord_bot.ocr import OCRClient
+from trainerdex.discord_bot.ocr import OCRQueueFull, Screenshot, merge_ocr_results
+from trainerdex.discord_bot.storage import StorageError
 from trainerdex.discord_bot.utils import chat_formatting
 from trainerdex.discord_bot.utils.converters import get_trainer_from_user
 
@@ -95,10 +97,38 @@ class PostModule(Module):
         kwargs.pop("image")
         kwargs = {k: v for k, v in kwargs.items() if v is not None}
 
-        if image is not None and not image.content_type.startswith("image/"):
-            image = None
+        await self._update_stats(ctx, [image] if image is not None else [], kwargs)
 
-        if not (image or kwargs):
+    @slash_command(
+        name="update-screenshots",
+        description="Update your stats with several images, if your stats don't fit on one screen.",
+        options=[
+            Option(Attachment, name="image", description="Image for OCR", required=True),
+            Option(Attachment, name="image_2", description="Image for OCR", required=False),
+            Option(Attachment, name="image_3", description="Image for OCR", required=False),
+            Option(Attachment, name="image_4", description="Image for OCR", required=False),
+            Option(Attachment, name="image_5", description="Image for OCR", required=False),
+        ],
+    )
+    async def update_via_screenshots(
+        self,
+        ctx: ApplicationContext,
+        image: Attachment,
+        image_2: Attachment | None = None,
+        image_3: Attachment | None = None,
+        image_4: Attachment | None = None,
+        image_5: Attachment | None = None,
+    ) -> None:
+        images: list[Attachment] = [
+            attachment for attachment in (image, image_2, image_3, image_4, image_5) if attachment
+        ]
+        await self._update_stats(ctx, images, {})
+
+    async def _update_stats(self, ctx: ApplicationContext, images: list[Attachment], kwargs: dict[str, Any]) -> None:
+        """Scan the screenshots, merging their stats with `kwargs`, and post a single update."""
+        images = [image for image in images if image.content_type.startswith("image/")]
+
+        if not (images or kwargs):
             await ctx.interaction.response.send_message(
                 (
                     "You haven't provided a valid image or any stats. Sorry, nothing I can do here. "
@@ -110,24 +140,50 @@ class PostModule(Module):
         await ctx.interaction.response.defer()
         ctx.interaction.response._responded = True
 
-        if image and not kwargs:
+        # Downloaded once, for both the re-post and the OCR.
+        screenshots: list[Screenshot] = await asyncio.gather(*(self._common.ocr.download(image) for image in images))
+
+        async def find_cached_ocr(screenshot: Screenshot) -> Dict[str, float] | None:
+            try:
+                return await self.config.find_ocr_result(ctx.interaction.user, screenshot.digest)
+            except StorageError:
+                # Scanning it again is better than failing the update.
+                self.private_logger.warning("Failed to look up a cached OCR result.", exc_info=True)
+                return None
+
+        # Screenshots the user has posted before are answered without scanning them again.
+        cached_ocr: list[Dict[str, float] | None] = await asyncio.gather(
+            *(find_cached_ocr(screenshot) for screenshot in screenshots)
+        )
+        if screenshots and not kwargs and all(result is not None for result in cached_ocr):
+            await ctx.respond(
+                chat_formatting.error(
+                    "It looks like you've already posted this screenshot. Did you upload an old screenshot?"
+                    if len(screenshots) == 1
+                    else "It looks like you've already posted these screenshots. Did you upload old screenshots?"
+                ),
+            )
+            return
+
+        shared: str = "an image" if len(screenshots) == 1 else f"{len(screenshots)} images"
+        if screenshots and not kwargs:
             await ctx.respond(
                 content=chat_formatting.info(
-                    f"{ctx.interaction.user.mention} shared an image for use with `/{ctx.command.qualified_name}`.",
+                    f"{ctx.interaction.user.mention} shared {shared} for use with `/{ctx.command.qualified_name}`.",
                 ),
-                file=await image.to_file(),
+                files=[screenshot.to_file() for screenshot in screenshots],
             )
-        elif image and kwargs:
+        elif screenshots and kwargs:
             await ctx.respond(
                 content=chat_formatting.info(
                     (
-                        f"{ctx.interaction.user.mention} shared an image for use with "
+                        f"{ctx.interaction.user.mention} shared {shared} for use with "
                         f"`/{ctx.command.qualified_name}`, "
                         f"with the following additional stats: "
                         f"{', '.join(f'`{key}: {value}`' for key, value in kwargs.items())}"
                     ),
                 ),
-                file=await image.to_file(),
+                files=[screenshot.to_file() for screenshot in screenshots],
             )
         else:
             await ctx.respond(
@@ -149,13 +205,45 @@ class PostModule(Module):
                 )
                 return
 
-            data_from_ocr = {}
-            if image is not None:
-                await ctx.respond("Analyzing image...", delete_after=30)
-                try:
-                    data_from_ocr: Dict[str, float] = await OCRClient.request_activity_view_scan(image)
-                except Exception:
-                    if not kwargs:
+            # Screenshots which haven't been scanned before.
+            to_scan: list[Screenshot] = [
+                screenshot for screenshot, result in zip(screenshots, cached_ocr) if result is None
+            ]
+            scanned: list[tuple[Screenshot, Dict[str, float]]] = []
+            if to_scan:
+                await ctx.respond(
+                    "Analyzing image..." if len(to_scan) == 1 else "Analyzing images...", delete_after=30
+                )
+
+                async def notify_queued(position: int) -> None:
+                    await ctx.respond(
+                        chat_formatting.info(f"The OCR is busy, your image is number {position} in the queue."),
+                        delete_after=60,
+                    )
+
+                # The OCR client limits how many are scanned at once, across every command.
+                results: list[Dict[str, float] | BaseException] = await asyncio.gather(
+                    *(
+                        self._common.ocr.request_activity_view_scan(screenshot, on_queued=notify_queued)
+                        for screenshot in to_scan
+                    ),
+                    return_exceptions=True,
+                )
+                scanned = [
+                    (screenshot, result)
+                    for screenshot, result in zip(to_scan, results)
+                    if not isinstance(result, BaseException)
+                ]
+                usable: bool = bool(kwargs or scanned or len(to_scan) < len(screenshots))
+
+                if any(isinstance(result, OCRQueueFull) for result in results):
+                    await ctx.respond(
+                        chat_formatting.error("The OCR is too busy right now, please try again in a few minutes."),
+                    )
+                    if not usable:
+                        return
+                elif len(scanned) < len(to_scan):
+                    if not usable:
                         await ctx.respond(
                             chat_formatting.error(
                                 (
@@ -165,7 +253,7 @@ class PostModule(Module):
                             ),
                         )
                         return
-                    else:
+                    elif len(screenshots) == 1:
                         await ctx.respond(
                             chat_formatting.warning(
                                 (
@@ -174,6 +262,19 @@ class PostModule(Module):
                                 ),
                             ),
                         )
+                    else:
+                        await ctx.respond(
+                            chat_formatting.warning(
+                                (
+                                    f"The OCR failed to process {len(to_scan) - len(scanned)} of your images, "
+                                    "but I'm still going to try to update your stats with the rest."
+                                ),
+                            ),
+                        )
+
+            data_from_ocr: Dict[str, float] = merge_ocr_results(
+                [result for result in cached_ocr if result is not None] + [result for _, result in scanned]
+            )
 
             stats_to_update = kwargs | data_from_ocr
 
@@ -209,7 +310,6 @@ class PostModule(Module):
                         )
                         raise HTTPException(None, data) from e
 
-                update = latest_update
                 await ctx.respond(
                     chat_formatting.success(
                         "It looks like you've posted in the last 30 minutes so I have updated your stats in place."
@@ -233,7 +333,7 @@ class PostModule(Module):
 
                 # If they have, create a new update.
                 try:
-                    update: Update = await trainer.post(
+                    await trainer.post(
                         stats=stats_to_update,
                         data_source="ss_ocr" if data_from_ocr else "ts_social_discord",
                         update_time=snowflake_time(ctx.interaction.id),
@@ -253,6 +353,12 @@ class PostModule(Module):
                         )
                         raise HTTPException(None, data) from e
 
+            for screenshot, result in scanned:
+                try:
+                    await self.config.add_ocr_result(ctx.interaction.user, screenshot.digest, result)
+                except StorageError:
+                    self.private_logger.warning("Failed to cache an OCR result.", exc_info=True)
+
             await ProfileModule.show_trainer_profile(self, ctx, trainer)
 
     # @slash_command(
@@ -10,6 +10,7 @@ from discord.user import User
 
 from trainerdex.api.exceptions import Forbidden, HTTPException, NotFound
 from trainerdex.api.trainer import Trainer
+from trainerdex.discord_bot.circuit import STALE_DATA_WARNING
 from trainerdex.discord_bot.embeds import ProfileCard
 from trainerdex.discord_bot.modules.base import Module
 from trainerdex.discord_bot.utils import chat_formatting
@@ -87,12 +88,11 @@ class ProfileModule(Module):
             embed=embed,
         )
 
-        await embed.add_leaderboard()
-        if ctx.guild:
-            message = await message.edit(embed=embed)
-            await embed.add_guild_leaderboard(ctx.guild)
-
-        message = await message.edit(content=None, embed=embed)
+        await embed.add_leaderboards(ctx.guild)
+        message = await message.edit(
+            content=chat_formatting.warning(STALE_DATA_WARNING) if module._common.client.served_stale else None,
+            embed=embed,
+        )
 
     @slash_command(
         name="get-trainer-code",
@@ -123,6 +123,8 @@ class ProfileModule(Module):
             else:
                 await ctx.respond(chat_formatting.info(f"{trainer.username}'s Trainer Code is:"))
                 await ctx.respond(chat_formatting.inline(trainer.trainer_code))
+                if client.served_stale:
+                    await ctx.respond(chat_formatting.warning(STALE_DATA_WARNING))
 
     edit_profile = SlashCommandGroup("edit-profile", "Edit various aspects about your profile.")
 
@@ -1,11 +1,12 @@
 from typing import TYPE_CHECKING, List
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
-from discord import ApplicationContext, Option, OptionChoice, Permissions, SlashCommandGroup, TextChannel
+from discord import ApplicationContext, Guild, Option, OptionChoice, Permissions, SlashCommandGroup, TextChannel
 from discord.role import Role
 
 from trainerdex.discord_bot.checks import check_member_privilage
 from trainerdex.discord_bot.modules.base import Module
+from trainerdex.discord_bot.modules.leaderboard import LeaderboardModule
 from trainerdex.discord_bot.utils.chat_formatting import error, info, success
 
 if TYPE_CHECKING:
@@ -18,6 +19,11 @@ class SettingsModule(Module):
     def METADATA_ID(cls) -> str:
         return "SettingsCog"
 
+    async def _reschedule_weekly_leaderboard(self, guild: Guild) -> None:
+        if (module := self.bot.get_cog(LeaderboardModule.__name__)) is not None:
+            # Read back rather than reusing the command's copy, in case the guild was changed in the meantime.
+            await module.schedule_weekly_leaderboard(await self.config.get_guild(guild))
+
     guild_config = SlashCommandGroup(
         "server-config",
         "Set server settings",
@@ -115,22 +121,22 @@ class SettingsModule(Module):
         guild_config: GuildConfig = await self.config.get_guild(ctx.guild)
 
         if array == "grant":
-            role_list: List[Role] = guild_config.roles_to_assign_on_approval.add or []
+            path: str = "roles_to_assign_on_approval.add"
+            role_list: List[int] = guild_config.roles_to_assign_on_approval.add
         elif array == "revoke":
-            role_list: List[Role] = guild_config.roles_to_assign_on_approval.remove or []
+            path: str = "roles_to_assign_on_approval.remove"
+            role_list: List[int] = guild_config.roles_to_assign_on_approval.remove
         else:
             raise ValueError()
 
         if action == "append":
-            if role.id not in role_list:
-                role_list.append(role.id)
+            guild_config.add_to_set(path, role.id)
 
             message = "{} was appended to the list. The list is now: {}"
             set_of_roles = {f"{ctx.guild.get_role(role_id).name or ''} ({role_id})" for role_id in role_list}
             await ctx.respond(success(message.format(role, ", ".join(set_of_roles))))
         elif action == "unappend":
-            while role.id in role_list:
-                role_list.remove(role.id)
+            guild_config.pull(path, role.id)
 
             set_of_roles = {f"{ctx.guild.get_role(role_id).name or ''} ({role_id})" for role_id in role_list}
             message = "{} was removed from the list. The list is now: {}"
@@ -142,10 +148,6 @@ class SettingsModule(Module):
                 "The following roles will be modified for a user when they are granted access to the guild:\n{}"
             )
             await ctx.respond(info(message.format(", ".join(set_of_roles))))
-        if array == "grant":
-            guild_config.roles_to_assign_on_approval.add = list(set(role_list))
-        elif array == "revoke":
-            guild_config.roles_to_assign_on_approval.remove = list(set(role_list))
         await self.config.set_guild(guild_config)
 
     @guild_config.command(
@@ -180,18 +182,16 @@ class SettingsModule(Module):
 
         guild_config: GuildConfig = await self.config.get_guild(ctx.guild)
 
-        role_list: List[Role] = guild_config.mod_role_ids or []
+        role_list: List[int] = guild_config.mod_role_ids
 
         if action == "append":
-            if role.id not in role_list:
-                role_list.append(role.id)
+            guild_config.add_to_set("mod_role_ids", role.id)
 
             message = "{} was appended to the list. The list is now: {}"
             set_of_roles = {f"{ctx.guild.get_role(role_id).name or ''} ({role_id})" for role_id in role_list}
             await ctx.respond(success(message.format(role, ", ".join(set_of_roles))))
         elif action == "unappend":
-            while role.id in role_list:
-                role_list.remove(role.id)
+            guild_config.pull("mod_role_ids", role.id)
 
             set_of_roles = {f"{ctx.guild.get_role(role_id).name or ''} ({role_id})" for role_id in role_list}
             message = "{} was removed from the list. The list is now: {}"
@@ -201,7 +201,6 @@ class SettingsModule(Module):
             set_of_roles = {f"{ctx.guild.get_role(role_id).name or ''} ({role_id})" for role_id in role_list}
             message = "The following roles are considered mods:\n{}"
             await ctx.respond(info(message.format(", ".join(set_of_roles))))
-        guild_config.mod_role_ids = list(set(role_list))
         await self.config.set_guild(guild_config)
 
     @guild_config.command(name="mystic-role", checks=[check_member_privilage])
@@ -269,6 +268,7 @@ class SettingsModule(Module):
             f"Set `timezone` to `{value}`.",
             ephemeral=True,
         )
+        await self._reschedule_weekly_leaderboard(ctx.guild)
 
     @guild_config.command(name="leaderboard-channel", checks=[check_member_privilage])
     async def guild_config__leaderboard_channel(self, ctx: ApplicationContext, value: TextChannel) -> None:
@@ -291,6 +291,7 @@ class SettingsModule(Module):
             f"Set `leaderboard_channel` to {value.mention}.",
             ephemeral=True,
         )
+        await self._reschedule_weekly_leaderboard(ctx.guild)
 
     @guild_config.command(name="enable-weekly-leaderboard", checks=[check_member_privilage])
     async def guild_config__post_weekly_leaderboards(self, ctx: ApplicationContext, value: bool) -> None:
@@ -303,3 +304,4 @@ class SettingsModule(Module):
             f"Set `post_weekly_leaderboards` to `{value}`.",
             ephemeral=True,
         )
+        await self._reschedule_weekly_leaderboard(ctx.guild)
@@ -1,19 +1,236 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import io
+import logging
+import multiprocessing
 import os
-from typing import ClassVar
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Awaitable, Callable, ClassVar, Iterable, Mapping
 
 import aiohttp
-from discord import Attachment
+from discord import Attachment, File
+
+from trainerdex.discord_bot import preprocessing
+from trainerdex.discord_bot.preprocessing import PreprocessOptions
+from trainerdex.discord_bot.utils.metrics import LatencyStats
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+
+class OCRQueueFull(Exception):
+    """Raised when too many screenshots are already waiting for the OCR service."""
+
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class Screenshot:
+    """A screenshot downloaded from Discord, so it can be re-posted and scanned without downloading it again."""
+
+    filename: str
+    data: bytes
+    description: str | None = None
+
+    @property
+    def digest(self) -> str:
+        """A digest of the file, so a screenshot which has been scanned before is recognised without scanning it."""
+        return hashlib.blake2b(self.data, digest_size=16).hexdigest()
+
+    def to_file(self) -> File:
+        # BytesIO shares the bytes' buffer rather than copying it, as long as nothing writes to it.
+        return File(io.BytesIO(self.data), filename=self.filename, description=self.description)
+
+
+@dataclass(slots=True)
+class OCRMetrics:
+    # Time spent waiting for a free slot.
+    queue_wait: LatencyStats = field(default_factory=LatencyStats)
+    # Time spent downloading the screenshot from Discord.
+    download: LatencyStats = field(default_factory=LatencyStats)
+    # Time spent preprocessing the screenshot, including waiting for a worker process.
+    preprocess: LatencyStats = field(default_factory=LatencyStats)
+    # Time from starting the upload until the OCR service responds.
+    ocr: LatencyStats = field(default_factory=LatencyStats)
+    rejected: int = 0
+    failed: int = 0
+    # Bytes downloaded from Discord and uploaded to the OCR service.
+    original_bytes: int = 0
+    uploaded_bytes: int = 0
+
+    @property
+    def compression_ratio(self) -> float:
+        return self.original_bytes / self.uploaded_bytes if self.uploaded_bytes else 1.0
 
 
 class OCRClient:
+    """Sends screenshots to the OCR service, at most `concurrency` at a time over one persistent session.
+
+    Up to `max_queue` further requests wait for a slot, any more are rejected with `OCRQueueFull`. The same limit
+    applies to requests waiting for a preprocessing worker.
+
+    Screenshots are shrunk before they're uploaded, see `preprocessing`. Set `OCR_PREPROCESS=0` to upload them
+    unchanged.
+    """
+
     HOST: ClassVar[str] = os.environ.get("TRAINERDEX_HOST", "https://trainerdex.app")
 
-    @classmethod
-    async def request_activity_view_scan(cls, image: Attachment) -> dict[str, float]:
-        async with aiohttp.ClientSession() as session:
-            headers = {"Content-Disposition": f"attachment; filename={image.filename}"}
-            async with session.put(
-                f"{cls.HOST}/api/ocr/activity-view/", data=await image.read(), headers=headers
+    def __init__(self, concurrency: int | None = None, max_queue: int | None = None) -> None:
+        self.concurrency: int = concurrency or int(os.environ.get("OCR_CONCURRENCY", 4))
+        self.max_queue: int = max_queue or int(os.environ.get("OCR_MAX_QUEUE", 50))
+        self.metrics: OCRMetrics = OCRMetrics()
+        self._semaphore: asyncio.Semaphore = asyncio.Semaphore(self.concurrency)
+        self._waiting: int = 0
+        self._session: aiohttp.ClientSession | None = None
+        self.preprocess: bool = preprocessing.is_available() and os.environ.get("OCR_PREPROCESS", "1") == "1"
+        self.preprocess_options: PreprocessOptions = PreprocessOptions()
+        self.preprocess_workers: int = int(os.environ.get("OCR_PREPROCESS_WORKERS", 2))
+        self._pool: ProcessPoolExecutor | None = None
+        # Keeps the pool's own queue empty, so requests waiting to be preprocessed can be counted and limited.
+        self._preprocess_semaphore: asyncio.Semaphore = asyncio.Semaphore(self.preprocess_workers)
+        self._waiting_to_preprocess: int = 0
+        if not preprocessing.is_available():
+            logger.info("Pillow isn't installed, screenshots will be uploaded to the OCR service unchanged.")
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    @property
+    def pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # Spawned rather than forked, so workers don't inherit the event loop and its threads.
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.preprocess_workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._pool
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def download(self, image: Attachment) -> Screenshot:
+        start: float = time.perf_counter()
+        data: bytes = await image.read()
+        self.metrics.download.record(time.perf_counter() - start)
+        return Screenshot(filename=image.filename, data=data, description=image.description)
+
+    async def _preprocess(self, screenshot: Screenshot) -> Screenshot:
+        """Return a smaller copy of the screenshot, or the screenshot itself if it can't be made smaller."""
+        start: float = time.perf_counter()
+        try:
+            data: bytes = await asyncio.get_running_loop().run_in_executor(
+                self.pool, preprocessing.preprocess_activity_view, screenshot.data, self.preprocess_options
+            )
+        except Exception:
+            logger.warning("Failed to preprocess %(filename)s.", {"filename": screenshot.filename}, exc_info=True)
+            return screenshot
+        finally:
+            self.metrics.preprocess.record(time.perf_counter() - start)
+
+        if len(data) >= len(screenshot.data):
+            return screenshot
+
+        filename: str = f"{os.path.splitext(screenshot.filename)[0]}.{self.preprocess_options.extension}"
+        return replace(screenshot, filename=filename, data=data)
+
+    async def _preprocess_queued(self, screenshot: Screenshot) -> Screenshot:
+        if self._preprocess_semaphore.locked():
+            if self._waiting_to_preprocess >= self.max_queue:
+                self.metrics.rejected += 1
+                raise OCRQueueFull(
+                    f"{self._waiting_to_preprocess} screenshots are already waiting to be preprocessed."
+                )
+            self._waiting_to_preprocess += 1
+            try:
+                await self._preprocess_semaphore.acquire()
+            finally:
+                self._waiting_to_preprocess -= 1
+        else:
+            await self._preprocess_semaphore.acquire()
+
+        try:
+            return await self._preprocess(screenshot)
+        finally:
+            self._preprocess_semaphore.release()
+
+    async def request_activity_view_scan(
+        self,
+        screenshot: Screenshot,
+        *,
+        on_queued: Callable[[int], Awaitable[None]] | None = None,
+    ) -> dict[str, float]:
+        """Scan a screenshot of the activity view.
+
+        If every slot is taken, `on_queued` is awaited with the request's position in the queue before waiting.
+        """
+        self.metrics.original_bytes += len(screenshot.data)
+        if self.preprocess:
+            # Preprocessed before taking a slot, so CPU work in the process pool doesn't hold up uploads.
+            screenshot = await self._preprocess_queued(screenshot)
+        self.metrics.uploaded_bytes += len(screenshot.data)
+
+        start: float = time.perf_counter()
+        queued: bool = self._semaphore.locked()
+        if queued:
+            if self._waiting >= self.max_queue:
+                self.metrics.rejected += 1
+                raise OCRQueueFull(f"{self._waiting} screenshots are already waiting for the OCR service.")
+            self._waiting += 1
+            position: int = self._waiting
+
+        try:
+            if queued and on_queued is not None:
+                await on_queued(position)
+            await self._semaphore.acquire()
+        finally:
+            if queued:
+                self._waiting -= 1
+
+        try:
+            self.metrics.queue_wait.record(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            headers = {"Content-Disposition": f"attachment; filename={screenshot.filename}"}
+            async with self.session.put(
+                f"{self.HOST}/api/ocr/activity-view/", data=screenshot.data, headers=headers
             ) as resp:
                 resp.raise_for_status()
-                return await resp.json()
+                result: dict[str, float] = await resp.json()
+            self.metrics.ocr.record(time.perf_counter() - start)
+        except Exception:
+            self.metrics.failed += 1
+            raise
+        finally:
+            self._semaphore.release()
+
+        logger.debug(
+            "OCR metrics: %(metrics)s, compression ratio %(ratio).1f",
+            {"metrics": self.metrics, "ratio": self.metrics.compression_ratio},
+        )
+        return result
+
+
+def merge_ocr_results(results: Iterable[Mapping[str, float | None]]) -> dict[str, float]:
+    """Merge the stats read from several screenshots.
+
+    Where screenshots disagree, the highest value wins, stats only go up so a lower one is older or misread.
+    """
+    merged: dict[str, float] = {}
+    for result in results:
+        for stat, value in result.items():
+            if value is not None and (stat not in merged or value > merged[stat]):
+                merged[stat] = value
+    return merged
@@ -0,0 +1,79 @@
+"""Shrinks activity view screenshots before they're uploaded to the OCR service.
+
+Requires Pillow. If it isn't installed, screenshots are uploaded unchanged.
+The work is CPU bound, so it runs in worker processes rather than on the event loop.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import os
+from dataclasses import dataclass
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+logger: logging.Logger = logging.getLogger(__name__)
+
+FORMAT_EXTENSIONS: dict[str, str] = {"JPEG": "jpg", "WEBP": "webp", "PNG": "png"}
+
+
+def is_available() -> bool:
+    return Image is not None
+
+
+def _parse_crop(value: str | None) -> tuple[float, float, float, float] | None:
+    if not value:
+        return None
+    left, top, right, bottom = (float(x) for x in value.split(","))
+    return left, top, right, bottom
+
+
+@dataclass(frozen=True, slots=True)
+class PreprocessOptions:
+    """How screenshots are preprocessed, pickled and sent to the worker processes."""
+
+    # Wider screenshots are scaled down to this width.
+    max_width: int = int(os.environ.get("OCR_PREPROCESS_MAX_WIDTH", 1080))
+    format: str = os.environ.get("OCR_PREPROCESS_FORMAT", "JPEG").upper()
+    quality: int = int(os.environ.get("OCR_PREPROCESS_QUALITY", 85))
+    grayscale: bool = os.environ.get("OCR_PREPROCESS_GRAYSCALE", "1") == "1"
+    # The stats region as fractions of the width and height: left, top, right, bottom. Uncropped when unset.
+    crop: tuple[float, float, float, float] | None = _parse_crop(os.environ.get("OCR_PREPROCESS_CROP"))
+
+    @property
+    def extension(self) -> str:
+        return FORMAT_EXTENSIONS.get(self.format, self.format.lower())
+
+
+def preprocess_activity_view(data: bytes, options: PreprocessOptions) -> bytes:
+    """Crop, scale down, convert to grayscale and recompress a screenshot, returning the encoded image.
+
+    Runs in a worker process, so it must only use its arguments.
+    """
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+
+        if options.crop is not None:
+            left, top, right, bottom = options.crop
+            image = image.crop(
+                (
+                    round(left * image.width),
+                    round(top * image.height),
+                    round(right * image.width),
+                    round(bottom * image.height),
+                )
+            )
+
+        if image.width > options.max_width:
+            height: int = round(image.height * options.max_width / image.width)
+            image = image.resize((options.max_width, height), Image.Resampling.LANCZOS)
+
+        image = image.convert("L" if options.grayscale else "RGB")
+
+        output: io.BytesIO = io.BytesIO()
+        image.save(output, format=options.format, quality=options.quality, optimize=True)
+        return output.getvalue()
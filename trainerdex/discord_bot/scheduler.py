@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Iterator
+
+from trainerdex.discord_bot.utils.metrics import LatencyStats
+
+
+class Priority(IntEnum):
+    # Lower values are served first.
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+# The priority of API requests made in the current context, tasks inherit it from whoever created them.
+request_priority: ContextVar[Priority] = ContextVar("request_priority", default=Priority.INTERACTIVE)
+
+
+@contextmanager
+def background_priority() -> Iterator[None]:
+    """Schedule API requests made inside this block, and tasks created inside it, behind interactive ones."""
+    token = request_priority.set(Priority.BACKGROUND)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class RequestScheduler:
+    """Limits requests to `rate` per second, with bursts of up to `burst`, using a token bucket.
+
+    When the bucket is empty, requests wait in priority order, so interactive commands are never stuck behind a
+    batch job's backlog.
+    """
+
+    def __init__(self, rate: float | None = None, burst: int | None = None) -> None:
+        self.rate: float = rate or float(os.environ.get("TRAINERDEX_RATE_LIMIT", 10))
+        self.burst: int = burst or int(os.environ.get("TRAINERDEX_RATE_LIMIT_BURST", 20))
+        self.wait_times: dict[Priority, LatencyStats] = {priority: LatencyStats() for priority in Priority}
+        self._tokens: float = float(self.burst)
+        self._updated_at: float = time.monotonic()
+        self._waiting: list[tuple[Priority, int, asyncio.Future]] = []
+        self._order: Iterator[int] = itertools.count()
+        self._dispatcher: asyncio.Task | None = None
+
+    @property
+    def queue_depth(self) -> dict[Priority, int]:
+        depth: dict[Priority, int] = {priority: 0 for priority in Priority}
+        for priority, _, future in self._waiting:
+            if not future.done():
+                depth[priority] += 1
+        return depth
+
+    def _refill(self) -> None:
+        now: float = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until a request may be sent, at the priority of the current context."""
+        priority: Priority = request_priority.get()
+        start: float = time.monotonic()
+
+        self._refill()
+        if not self._waiting and self._tokens >= 1:
+            self._tokens -= 1
+        else:
+            future: asyncio.Future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiting, (priority, next(self._order), future))
+            if self._dispatcher is None or self._dispatcher.done():
+                self._dispatcher = asyncio.create_task(self._dispatch())
+            await future
+
+        self.wait_times[priority].record(time.monotonic() - start)
+
+    async def _dispatch(self) -> None:
+        while self._waiting:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                continue
+
+            _, _, future = heapq.heappop(self._waiting)
+            # Skip requests whose caller gave up waiting.
+            if not future.done():
+                self._tokens -= 1
+                future.set_result(None)
@@ -0,0 +1,20 @@
+import os
+
+from .base import ChangeStreamUnavailable, Index, StorageBackend, StorageError  # noqa: F401
+from .memory import MemoryBackend  # noqa: F401
+from .motor import MotorBackend  # noqa: F401
+
+
+def get_backend(name: str | None = None) -> StorageBackend:
+    """Create the backend named by `name`, or the `STORAGE_BACKEND` environment variable, defaulting to MongoDB."""
+    name = (name or os.environ.get("STORAGE_BACKEND", "mongodb")).lower()
+    if name == "mongodb":
+        return MotorBackend()
+    elif name == "memory":
+        return MemoryBackend()
+    elif name == "sqlite":
+        # aiosqlite is only needed by deployments which choose SQLite.
+        from .sqlite import SQLiteBackend
+
+        return SQLiteBackend()
+    raise ValueError(f"Unknown storage backend {name!r}, expected one of: mongodb, memory, sqlite.")
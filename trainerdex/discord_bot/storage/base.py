@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Mapping, Sequence
+
+
+class StorageError(Exception):
+    """Raised when a storage backend fails to complete an operation."""
+
+    pass
+
+
+class ChangeStreamUnavailable(StorageError):
+    """Raised when a storage backend can't report changes made by other processes."""
+
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class Index:
+    name: str
+    keys: tuple[str, ...]
+    unique: bool = False
+    # Only index documents matching this query, backends which don't support partial indexes index everything.
+    partial: Mapping[str, Any] | None = None
+
+
+class StorageBackend(ABC):
+    """Stores the bot's config documents, grouped into named collections.
+
+    Queries and updates are written in the subset of MongoDB's syntax understood by `storage.query`, so the
+    MongoDB backend can pass them through unchanged.
+    """
+
+    async def setup(self) -> None:
+        """Prepare the backend, this is awaited once before any other operation."""
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def find_one(self, collection: str, query: Mapping[str, Any]) -> Mapping[str, Any] | None:
+        ...
+
+    @abstractmethod
+    def find(
+        self,
+        collection: str,
+        query: Mapping[str, Any],
+        *,
+        sort: Sequence[str] | None = None,
+        batch_size: int | None = None,
+    ) -> AsyncIterator[Mapping[str, Any]]:
+        """Iterate over the documents matching `query`, in ascending order of the `sort` fields if provided."""
+        ...
+
+    @abstractmethod
+    async def upsert(
+        self,
+        collection: str,
+        query: Mapping[str, Any],
+        update: Mapping[str, Mapping[str, Any]],
+    ) -> Mapping[str, Any]:
+        """Atomically apply `update` to the document matching `query`, inserting it if missing.
+
+        Returns the document as it is after the update.
+        """
+        ...
+
+    async def bulk_upsert(
+        self,
+        collection: str,
+        operations: Sequence[tuple[Mapping[str, Any], Mapping[str, Mapping[str, Any]]]],
+    ) -> None:
+        """Apply many `(query, update)` upserts, in no particular order.
+
+        Backends which can should override this to send them in a single round trip.
+        """
+        for query, update in operations:
+            await self.upsert(collection, query, update)
+
+    @abstractmethod
+    async def delete_many(self, collection: str, query: Mapping[str, Any]) -> int:
+        """Delete every document matching `query`, returning how many were deleted."""
+        ...
+
+    @abstractmethod
+    async def ensure_indexes(self, collection: str, indexes: Sequence[Index]) -> None:
+        ...
+
+    def watch(self, collection: str) -> AsyncIterator[Any]:
+        """Iterate over the `_id` of each document in `collection` as it's changed by any process.
+
+        Yields None if every document may have changed.
+        Raises `ChangeStreamUnavailable` if the backend can't observe changes from other processes.
+        """
+        raise ChangeStreamUnavailable(f"{self.__class__.__name__} doesn't support change streams.")
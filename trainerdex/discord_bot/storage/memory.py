@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from copy import deepcopy
+from typing import Any, AsyncIterator, Mapping, Sequence
+from uuid import uuid4
+
+from trainerdex.discord_bot.storage.base import Index, StorageBackend, StorageError
+from trainerdex.discord_bot.storage.query import apply_update, equality_fields, get_path, matches, set_path
+
+
+class MemoryBackend(StorageBackend):
+    """Keeps documents in process memory, so nothing survives a restart.
+
+    Intended for tests and load tests which shouldn't need a database server.
+    """
+
+    def __init__(self) -> None:
+        self._collections: dict[str, dict[Any, dict[str, Any]]] = {}
+        self._unique_indexes: dict[str, list[Index]] = {}
+
+    def _documents(self, collection: str) -> dict[Any, dict[str, Any]]:
+        return self._collections.setdefault(collection, {})
+
+    def _check_unique(self, collection: str, document: Mapping[str, Any]) -> None:
+        for index in self._unique_indexes.get(collection, []):
+            key = tuple(get_path(document, path) for path in index.keys)
+            for other in self._documents(collection).values():
+                if other["_id"] != document["_id"] and tuple(get_path(other, path) for path in index.keys) == key:
+                    raise StorageError(f"Duplicate key for index {index.name!r}: {key!r}")
+
+    async def find_one(self, collection: str, query: Mapping[str, Any]) -> Mapping[str, Any] | None:
+        for document in self._documents(collection).values():
+            if matches(document, query):
+                return deepcopy(document)
+        return None
+
+    async def find(
+        self,
+        collection: str,
+        query: Mapping[str, Any],
+        *,
+        sort: Sequence[str] | None = None,
+        batch_size: int | None = None,
+    ) -> AsyncIterator[Mapping[str, Any]]:
+        documents: list[dict[str, Any]] = [
+            deepcopy(document) for document in self._documents(collection).values() if matches(document, query)
+        ]
+        if sort:
+            documents.sort(key=lambda document: tuple(get_path(document, path) for path in sort))
+        for document in documents:
+            yield document
+
+    async def upsert(
+        self,
+        collection: str,
+        query: Mapping[str, Any],
+        update: Mapping[str, Mapping[str, Any]],
+    ) -> Mapping[str, Any]:
+        documents: dict[Any, dict[str, Any]] = self._documents(collection)
+        existing: dict[str, Any] | None = next((d for d in documents.values() if matches(d, query)), None)
+
+        if existing is None:
+            document: dict[str, Any] = {"_id": uuid4().hex}
+            for path, value in equality_fields(query).items():
+                set_path(document, path, value)
+            apply_update(document, deepcopy(update), inserting=True)
+        else:
+            document: dict[str, Any] = deepcopy(existing)
+            apply_update(document, deepcopy(update))
+
+        self._check_unique(collection, document)
+        documents[document["_id"]] = document
+        return deepcopy(document)
+
+    async def delete_many(self, collection: str, query: Mapping[str, Any]) -> int:
+        documents: dict[Any, dict[str, Any]] = self._documents(collection)
+        matching: list[Any] = [key for key, document in documents.items() if matches(document, query)]
+        for key in matching:
+            del documents[key]
+        return len(matching)
+
+    async def ensure_indexes(self, collection: str, indexes: Sequence[Index]) -> None:
+        # Lookups scan every document anyway, only uniqueness needs enforcing.
+        self._unique_indexes[collection] = [index for index in indexes if index.unique]
@@ -0,0 +1,80 @@
+"""Evaluates the subset of MongoDB's query and update syntax used by `Config`, for backends other than MongoDB.
+
+Queries support equality and the `$in` and `$ne` operators. Updates support `$set`, `$setOnInsert`,
+`$addToSet` (with `$each`) and `$pull` (with `$in`). Field names may be dotted paths into nested documents.
+"""
+from __future__ import annotations
+
+from typing import Any, Mapping, MutableMapping
+
+
+def get_path(document: Mapping[str, Any], path: str) -> Any:
+    """Return the value at a dotted `path`, or None if any part of it is missing."""
+    value: Any = document
+    for name in path.split("."):
+        if not isinstance(value, Mapping):
+            return None
+        value = value.get(name)
+    return value
+
+
+def set_path(document: MutableMapping[str, Any], path: str, value: Any) -> None:
+    *parents, name = path.split(".")
+    for parent in parents:
+        document = document.setdefault(parent, {})
+    document[name] = value
+
+
+def _matches_condition(value: Any, condition: Any) -> bool:
+    if isinstance(condition, Mapping) and condition and all(key.startswith("$") for key in condition):
+        for operator, operand in condition.items():
+            if operator == "$in":
+                if value not in operand:
+                    return False
+            elif operator == "$ne":
+                if value == operand:
+                    return False
+            else:
+                raise ValueError(f"Unsupported query operator {operator!r}.")
+        return True
+    return value == condition
+
+
+def matches(document: Mapping[str, Any], query: Mapping[str, Any]) -> bool:
+    return all(_matches_condition(get_path(document, path), condition) for path, condition in query.items())
+
+
+def equality_fields(query: Mapping[str, Any]) -> dict[str, Any]:
+    """Return the fields fixed by `query`, which an upsert copies into the document it inserts."""
+    return {
+        path: condition
+        for path, condition in query.items()
+        if not (isinstance(condition, Mapping) and any(key.startswith("$") for key in condition))
+    }
+
+
+def apply_update(
+    document: MutableMapping[str, Any],
+    update: Mapping[str, Mapping[str, Any]],
+    *,
+    inserting: bool = False,
+) -> None:
+    """Apply `update` to `document` in place. `$setOnInsert` only applies if `inserting` is set."""
+    for operator, fields in update.items():
+        if operator == "$setOnInsert" and not inserting:
+            continue
+
+        for path, operand in fields.items():
+            if operator in ("$set", "$setOnInsert"):
+                set_path(document, path, operand)
+            elif operator == "$addToSet":
+                array: list = list(get_path(document, path) or [])
+                for value in operand["$each"] if isinstance(operand, Mapping) else [operand]:
+                    if value not in array:
+                        array.append(value)
+                set_path(document, path, array)
+            elif operator == "$pull":
+                values: list = operand["$in"] if isinstance(operand, Mapping) else [operand]
+                set_path(document, path, [value for value in get_path(document, path) or [] if value not in values])
+            else:
+                raise ValueError(f"Unsupported update operator {operator!r}.")
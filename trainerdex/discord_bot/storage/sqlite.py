@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+from datetime import datetime
+from typing import Any, AsyncIterator, Mapping, Sequence
+from uuid import UUID, uuid4
+
+import aiosqlite
+
+from trainerdex.discord_bot.storage.base import Index, StorageBackend, StorageError
+from trainerdex.discord_bot.storage.query import apply_update, equality_fields, get_path, matches, set_path
+
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"$date": value.isoformat()}
+    if isinstance(value, UUID):
+        return {"$uuid": str(value)}
+    raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+
+def _object_hook(value: dict[str, Any]) -> Any:
+    if len(value) == 1:
+        if "$date" in value:
+            return datetime.fromisoformat(value["$date"])
+        if "$uuid" in value:
+            return UUID(value["$uuid"])
+    return value
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=_default, separators=(",", ":"))
+
+
+def _loads(value: str) -> Any:
+    return json.loads(value, object_hook=_object_hook)
+
+
+def _quote(identifier: str) -> str:
+    if not _IDENTIFIER.match(identifier):
+        raise ValueError(f"Invalid identifier {identifier!r}.")
+    return f'"{identifier}"'
+
+
+def _json_path(path: str) -> str:
+    if not all(_IDENTIFIER.match(name) for name in path.split(".")):
+        raise ValueError(f"Invalid field path {path!r}.")
+    return f"json_extract(document, '$.{path}')"
+
+
+class SQLiteBackend(StorageBackend):
+    """Stores each collection as a table of JSON documents in a SQLite database.
+
+    Intended for small, self-hosted deployments. Only one process should use a database file at a time.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path: str = path or os.environ.get("SQLITE_PATH", "trainerdex.sqlite3")
+        self._connection: aiosqlite.Connection | None = None
+        self._tables: set[str] = set()
+        # Upserts read then write, so writes are serialised to keep them atomic on the shared connection.
+        self._write_lock: asyncio.Lock = asyncio.Lock()
+
+    @property
+    def connection(self) -> aiosqlite.Connection:
+        if self._connection is None:
+            raise StorageError("SQLiteBackend.setup() must be awaited before use.")
+        return self._connection
+
+    async def setup(self) -> None:
+        try:
+            self._connection = await aiosqlite.connect(self.path)
+            await self._connection.execute("PRAGMA journal_mode=WAL")
+        except aiosqlite.Error as e:
+            raise StorageError(str(e)) from e
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    async def _table(self, collection: str) -> str:
+        table: str = _quote(collection)
+        if collection not in self._tables:
+            await self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (_id TEXT PRIMARY KEY, document TEXT NOT NULL)"
+            )
+            self._tables.add(collection)
+        return table
+
+    @staticmethod
+    def _where(query: Mapping[str, Any]) -> tuple[str, list[Any]]:
+        """Translate the parts of `query` which map cleanly onto SQL, so they can use the indexes.
+
+        Results are always filtered with `query.matches` too, so anything left out here is still applied.
+        """
+        clauses: list[str] = []
+        parameters: list[Any] = []
+        for path, condition in query.items():
+            column: str = "_id" if path == "_id" else _json_path(path)
+            encode = _dumps if path == "_id" else (lambda value: value)
+
+            if isinstance(condition, Mapping) and set(condition) == {"$in"}:
+                values = [encode(value) for value in condition["$in"] if isinstance(value, (int, str))]
+                if len(values) != len(condition["$in"]):
+                    continue
+                clauses.append(f"{column} IN ({', '.join('?' * len(values))})" if values else "0")
+                parameters.extend(values)
+            elif isinstance(condition, Mapping) and condition == {"$ne": None}:
+                clauses.append(f"{column} IS NOT NULL")
+            elif condition is None:
+                clauses.append(f"{column} IS NULL")
+            elif isinstance(condition, (bool, int, str)):
+                clauses.append(f"{column} = ?")
+                parameters.append(encode(condition))
+
+        return (f"WHERE {' AND '.join(clauses)}" if clauses else ""), parameters
+
+    async def _select(self, collection: str, query: Mapping[str, Any]) -> list[dict[str, Any]]:
+        try:
+            table: str = await self._table(collection)
+            where, parameters = self._where(query)
+            async with self.connection.execute(f"SELECT document FROM {table} {where}", parameters) as cursor:
+                documents: list[dict[str, Any]] = [_loads(row[0]) for row in await cursor.fetchall()]
+        except aiosqlite.Error as e:
+            raise StorageError(str(e)) from e
+        return [document for document in documents if matches(document, query)]
+
+    async def find_one(self, collection: str, query: Mapping[str, Any]) -> Mapping[str, Any] | None:
+        documents: list[dict[str, Any]] = await self._select(collection, query)
+        return documents[0] if documents else None
+
+    async def find(
+        self,
+        collection: str,
+        query: Mapping[str, Any],
+        *,
+        sort: Sequence[str] | None = None,
+        batch_size: int | None = None,
+    ) -> AsyncIterator[Mapping[str, Any]]:
+        documents: list[dict[str, Any]] = await self._select(collection, query)
+        if sort:
+            documents.sort(key=lambda document: tuple(get_path(document, path) for path in sort))
+        for document in documents:
+            yield document
+
+    async def upsert(
+        self,
+        collection: str,
+        query: Mapping[str, Any],
+        update: Mapping[str, Mapping[str, Any]],
+    ) -> Mapping[str, Any]:
+        async with self._write_lock:
+            try:
+                table: str = await self._table(collection)
+                documents: list[dict[str, Any]] = await self._select(collection, query)
+                if documents:
+                    document: dict[str, Any] = documents[0]
+                    apply_update(document, update)
+                else:
+                    document: dict[str, Any] = {"_id": uuid4().hex}
+                    for path, value in equality_fields(query).items():
+                        set_path(document, path, value)
+                    apply_update(document, update, inserting=True)
+
+                await self.connection.execute(
+                    f"INSERT OR REPLACE INTO {table} (_id, document) VALUES (?, ?)",
+                    (_dumps(document["_id"]), _dumps(document)),
+                )
+                await self.connection.commit()
+            except aiosqlite.Error as e:
+                await self.connection.rollback()
+                raise StorageError(str(e)) from e
+        return document
+
+    async def delete_many(self, collection: str, query: Mapping[str, Any]) -> int:
+        async with self._write_lock:
+            try:
+                table: str = await self._table(collection)
+                keys: list[str] = [_dumps(document["_id"]) for document in await self._select(collection, query)]
+                if keys:
+                    await self.connection.execute(
+                        f"DELETE FROM {table} WHERE _id IN ({', '.join('?' * len(keys))})",
+                        keys,
+                    )
+                    await self.connection.commit()
+            except aiosqlite.Error as e:
+                await self.connection.rollback()
+                raise StorageError(str(e)) from e
+        return len(keys)
+
+    async def ensure_indexes(self, collection: str, indexes: Sequence[Index]) -> None:
+        try:
+            table: str = await self._table(collection)
+            for index in indexes:
+                columns: str = ", ".join(_json_path(key) for key in index.keys)
+                await self.connection.execute(
+                    f"CREATE {'UNIQUE ' if index.unique else ''}INDEX IF NOT EXISTS "
+                    f"{_quote(f'{collection}_{index.name}')} ON {table} ({columns})"
+                )
+            await self.connection.commit()
+        except aiosqlite.Error as e:
+            await self.connection.rollback()
+            raise StorageError(str(e)) from e
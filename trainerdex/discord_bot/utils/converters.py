@@ -1,27 +1,35 @@
+import asyncio
+
 from discord import User
 
 from trainerdex.api.client import BaseClient
 from trainerdex.api.exceptions import NotFound
-from trainerdex.api.socialconnection import SocialConnection
 from trainerdex.api.trainer import Trainer
+from trainerdex.discord_bot.client import PooledClient
 from trainerdex.discord_bot.utils.validators import validate_trainer_nickname
 
 
-async def get_trainer_from_user(client: BaseClient, user: User, *, prefetch_updates: bool = True) -> Trainer | None:
+async def get_trainer_from_user(
+    client: PooledClient, user: User, *, prefetch_updates: bool = True
+) -> Trainer | None:
     """Retrieve a profile from a user's Discord ID.
 
+    The trainer each user is linked to is cached by the client, see `PooledClient.get_trainer_id_for_discord_user`.
+
     This will also fetch updates unless the prefetch_updates argument is set to False.
     """
-    social_connections: list[SocialConnection] = await client.get_social_connections(
-        "discord",
-        [str(user.id)],
-    )
+    trainer_id: int | None = await client.get_trainer_id_for_discord_user(user.id)
+    if trainer_id is None:
+        return None
 
-    if social_connections:
-        trainer: Trainer = await social_connections[0].get_trainer()
-        if prefetch_updates:
-            await trainer.fetch_updates()
-        return trainer
+    try:
+        return await client.get_trainer(trainer_id, fetch_updates=prefetch_updates)
+    except NotFound:
+        # The cached link is stale, the user may have been linked to another trainer since. Look them up again.
+        client.forget_discord_user(user.id)
+        if (trainer_id := await client.get_trainer_id_for_discord_user(user.id)) is None:
+            return None
+        return await client.get_trainer(trainer_id, fetch_updates=prefetch_updates)
 
 
 async def get_trainer_from_nickname(
@@ -45,7 +53,7 @@ async def get_trainer_from_nickname(
 
 
 async def get_trainer(
-    client: BaseClient,
+    client: PooledClient,
     *,
     nickname: str | None = None,
     user: User | None = None,
@@ -54,13 +62,21 @@ async def get_trainer(
     """Retrieve a profile from a Pokémon Go nickname or user's Discord ID
 
     This will prefer nickname, so if both return a result, the nickname will be used.
+    Both are looked up concurrently, and the user lookup is cancelled if the nickname is found first.
 
     This will also fetch updates unless the prefetch_updates argument is set to False.
     """
-    from_nickname = await get_trainer_from_nickname(client, nickname, prefetch_updates=False) if nickname else None
-    from_user = await get_trainer_from_user(client, user, prefetch_updates=False) if user else None
+    from_user: asyncio.Task | None = (
+        asyncio.create_task(get_trainer_from_user(client, user, prefetch_updates=False)) if user else None
+    )
+    try:
+        trainer = await get_trainer_from_nickname(client, nickname, prefetch_updates=False) if nickname else None
+        if trainer is None and from_user is not None:
+            trainer = await from_user
+    finally:
+        if from_user is not None and not from_user.done():
+            from_user.cancel()
 
-    trainer = from_nickname or from_user
     if trainer and prefetch_updates:
         await trainer.fetch_updates()
 
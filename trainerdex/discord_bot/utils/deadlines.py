@@ -1,11 +1,17 @@
+import asyncio
+import heapq
+import itertools
 from datetime import datetime
+from typing import Generic, Hashable, Iterator, TypeVar
 from zoneinfo import ZoneInfo
 
 from dateutil.relativedelta import MO, relativedelta
 
-from trainerdex.discord_bot.config import Config
+from trainerdex.discord_bot.config import get_config
 from trainerdex.discord_bot.datatypes import GuildConfig
 
+K = TypeVar("K", bound=Hashable)
+
 SHUTDOWN_DATE = datetime.fromtimestamp(
     1704067199, tz=ZoneInfo("UTC")
 )  # on second before midnight, same time used in Daves message
@@ -20,7 +26,7 @@ async def get_last_deadline(
 ) -> datetime:
     if not timezone:
         if not guild_config:
-            guild_config = await Config().get_guild(guild_id)
+            guild_config = await get_config().get_guild(guild_id)
         timezone = ZoneInfo(guild_config.timezone or "UTC")
 
     if not now:
@@ -46,3 +52,74 @@ async def get_next_deadline(
 ) -> datetime:
     last_deadline = await get_last_deadline(guild_id=guild_id, guild_config=guild_config, timezone=timezone, now=now)
     return last_deadline + relativedelta(weeks=1)
+
+
+class DeadlineQueue(Generic[K]):
+    """Holds one deadline per key, and waits for the earliest of them to pass.
+
+    Deadlines are kept in a min-heap. When a key is rescheduled or removed its old entry stays in the heap, and is
+    skipped once it reaches the top.
+    """
+
+    # The longest `wait` sleeps before checking the clock again, in case the system clock is changed.
+    MAX_SLEEP: float = 3600
+
+    def __init__(self) -> None:
+        self._heap: list[tuple[datetime, int, K]] = []
+        # The current entry for each key, entries in the heap which don't match are stale.
+        self._entries: dict[K, tuple[datetime, int]] = {}
+        self._order: Iterator[int] = itertools.count()
+        self._changed: asyncio.Event = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._entries
+
+    def get(self, key: K) -> datetime | None:
+        return entry[0] if (entry := self._entries.get(key)) is not None else None
+
+    def schedule(self, key: K, deadline: datetime) -> None:
+        """Set the key's deadline, replacing any it already had. `deadline` must be timezone aware."""
+        entry: tuple[datetime, int] = (deadline, next(self._order))
+        self._entries[key] = entry
+        heapq.heappush(self._heap, (*entry, key))
+        if len(self._heap) > 2 * len(self._entries) + 16:
+            self._heap = [(*entry, key) for key, entry in self._entries.items()]
+            heapq.heapify(self._heap)
+        self._changed.set()
+
+    def remove(self, key: K) -> None:
+        if self._entries.pop(key, None) is not None:
+            self._changed.set()
+
+    def _peek(self) -> tuple[datetime, int, K] | None:
+        while self._heap:
+            deadline, order, key = self._heap[0]
+            if self._entries.get(key) == (deadline, order):
+                return self._heap[0]
+            heapq.heappop(self._heap)
+        return None
+
+    async def wait(self) -> tuple[K, datetime]:
+        """Wait until the earliest deadline has passed, then remove it and return its key and deadline.
+
+        Deadlines scheduled while waiting are taken into account, even if they're earlier.
+        """
+        while True:
+            self._changed.clear()
+            if (top := self._peek()) is not None:
+                deadline, _, key = top
+                remaining: float = (deadline - datetime.now(tz=ZoneInfo("UTC"))).total_seconds()
+                if remaining <= 0:
+                    heapq.heappop(self._heap)
+                    del self._entries[key]
+                    return key, deadline
+            else:
+                remaining = self.MAX_SLEEP
+
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=min(remaining, self.MAX_SLEEP))
+            except asyncio.TimeoutError:
+                pass
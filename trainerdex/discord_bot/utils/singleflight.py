@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class SingleFlight(Generic[K, V]):
+    """Shares one in-flight call between concurrent callers with the same key.
+
+    Every caller receives the same result object, so it must not be mutated.
+    """
+
+    def __init__(self) -> None:
+        self.calls: int = 0
+        # Calls which joined one already in flight, rather than making their own.
+        self.collapsed: int = 0
+        self._in_flight: dict[K, asyncio.Task[V]] = {}
+
+    def __len__(self) -> int:
+        return len(self._in_flight)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._in_flight
+
+    async def do(self, key: K, func: Callable[[], Awaitable[V]]) -> V:
+        self.calls += 1
+        if (task := self._in_flight.get(key)) is not None:
+            self.collapsed += 1
+        else:
+            task = self._in_flight[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # Shielded, so a cancelled caller doesn't cancel the call for everyone else waiting on it.
+        return await asyncio.shield(task)